@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     database_url: str = Field(default="postgresql://localhost:5432/reelforge")
     db_pool_min_size: int = Field(default=5)
     db_pool_max_size: int = Field(default=20)
+    db_statement_cache_size: int = Field(default=256)  # Prepared statements cached per connection (asyncpg default 100)
     
     # Redis
     redis_url: str = Field(default="redis://localhost:6379/0")
@@ -61,10 +62,12 @@ class Settings(BaseSettings):
 
     # Pipeline Limits (per task run)
     email_extraction_limit: int = Field(default=75)  # 4 runs/day = 300/day capacity
+    email_extraction_chunk_size: int = Field(default=10)  # Prospects per extraction sub-task
     email_verification_limit: int = Field(default=100)  # 4 runs/day = 400/day capacity
     auto_enrollment_limit: int = Field(default=50)  # 8 runs/day = 400/day capacity
     discovery_keywords_limit: int = Field(default=10)
     discovery_videos_per_keyword: int = Field(default=50)
+    youtube_discovery_concurrency: int = Field(default=3)  # Keywords searched in parallel
 
     # SerpApi (Google Trends)
     serpapi_api_key: str = Field(default="")
@@ -72,14 +75,24 @@ class Settings(BaseSettings):
     trends_rising_threshold: int = Field(default=50)  # Score above this = high priority
 
     # Rate Limits (seconds between API calls)
-    youtube_api_rate_limit: float = Field(default=0.5)  # 500ms between YouTube API calls
+    youtube_api_rate_limit: float = Field(default=0.5)  # At most one YouTube API call per 500ms
     email_verification_rate_limit: float = Field(default=0.1)  # 100ms between verification calls
+    email_verification_concurrency: int = Field(default=5)  # Max verification calls in flight
+    email_verification_cache_size: int = Field(default=10000)  # Verified addresses kept in memory
+    email_verification_cache_ttl: int = Field(default=86400)  # Seconds a cached verdict stays valid
+    email_verification_cache_days: int = Field(default=30)  # Days a verdict in email_verification_cache is reused
     trends_api_rate_limit: float = Field(default=1.0)  # 1s between SerpApi calls
+    trends_concurrency: int = Field(default=3)  # Max SerpApi trend calls in flight
+    trends_cache_ttl: int = Field(default=21600)  # 6h - cached Google Trends scores
+    trends_batch_size: int = Field(default=1)  # Keywords per SerpApi call (max 5); >1 makes scores group-relative
 
     # Sync Limits (batch sizes for external syncs)
     brevo_sync_batch_limit: int = Field(default=100)  # Contacts per Brevo sync batch
     brevo_max_sync_per_run: int = Field(default=500)  # Max contacts to sync per task run
 
+    # Celery Worker
+    worker_max_tasks_per_child: int = Field(default=500)  # Recycle a worker process after this many tasks to cap RSS
+
     # Application
     environment: str = Field(default="development")
     admin_api_key: str = Field(default="change-me-in-production")
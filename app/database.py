@@ -2,6 +2,8 @@
 ReelForge Marketing Engine - Database Connection
 """
 
+import asyncio
+
 import asyncpg
 import structlog
 
@@ -9,8 +11,9 @@ from app.config import get_settings
 
 logger = structlog.get_logger()
 
-# Global pool for FastAPI lifespan
+# Global pool for FastAPI lifespan, and the per-process shared pool for Celery workers
 _app_pool: asyncpg.Pool = None
+_app_pool_lock = asyncio.Lock()
 
 
 async def get_database_async() -> asyncpg.Pool:
@@ -21,6 +24,7 @@ async def get_database_async() -> asyncpg.Pool:
         min_size=2,
         max_size=10,
         command_timeout=60,
+        statement_cache_size=settings.db_statement_cache_size,
     )
     logger.debug("Database pool created")
     return pool
@@ -34,6 +38,27 @@ async def init_database() -> asyncpg.Pool:
     return _app_pool
 
 
+async def get_shared_pool() -> asyncpg.Pool:
+    """Return the process-wide pool, creating it on first use.
+
+    Callers must not close it; it lives until close_database() at shutdown.
+    """
+    global _app_pool
+    if _app_pool is None:
+        async with _app_pool_lock:
+            if _app_pool is None:
+                settings = get_settings()
+                _app_pool = await asyncpg.create_pool(
+                    settings.database_url,
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    command_timeout=60,
+                    statement_cache_size=settings.db_statement_cache_size,
+                )
+                logger.info("Shared database pool initialized")
+    return _app_pool
+
+
 async def close_database():
     """Close the global database pool."""
     global _app_pool
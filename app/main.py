@@ -73,19 +73,31 @@ async def get_status():
     try:
         db = await get_database_async()
         
+        # One pass per table: FILTER aggregates replace a separate COUNT(*) scan per status
         counts = await db.fetchrow("""
-            SELECT
-                (SELECT COUNT(*) FROM marketing_prospects) as prospects,
-                (SELECT COUNT(*) FROM marketing_prospects WHERE email IS NOT NULL) as with_email,
-                (SELECT COUNT(*) FROM marketing_prospects WHERE email_verified = TRUE) as verified,
-                (SELECT COUNT(*) FROM outreach_sequences WHERE status = 'pending') as pending_sequences,
-                (SELECT COUNT(*) FROM outreach_sequences WHERE status = 'active') as active_sequences,
-                (SELECT COUNT(*) FROM outreach_sequences WHERE status = 'completed') as completed_sequences,
-                (SELECT COUNT(*) FROM email_sends) as total_emails_sent,
-                (SELECT COUNT(*) FROM email_sends WHERE status = 'delivered') as delivered,
-                (SELECT COUNT(*) FROM email_sends WHERE status = 'opened') as opened,
-                (SELECT COUNT(*) FROM email_sends WHERE status = 'clicked') as clicked,
-                (SELECT COUNT(*) FROM affiliates WHERE status = 'active') as affiliates
+            SELECT p.prospects, p.with_email, p.verified,
+                   s.pending_sequences, s.active_sequences, s.completed_sequences,
+                   e.total_emails_sent, e.delivered, e.opened, e.clicked,
+                   a.affiliates
+            FROM (
+                SELECT COUNT(*) as prospects,
+                       COUNT(*) FILTER (WHERE email IS NOT NULL) as with_email,
+                       COUNT(*) FILTER (WHERE email_verified = TRUE) as verified
+                FROM marketing_prospects
+            ) p, (
+                SELECT COUNT(*) FILTER (WHERE status = 'pending') as pending_sequences,
+                       COUNT(*) FILTER (WHERE status = 'active') as active_sequences,
+                       COUNT(*) FILTER (WHERE status = 'completed') as completed_sequences
+                FROM outreach_sequences
+            ) s, (
+                SELECT COUNT(*) as total_emails_sent,
+                       COUNT(*) FILTER (WHERE status = 'delivered') as delivered,
+                       COUNT(*) FILTER (WHERE status = 'opened') as opened,
+                       COUNT(*) FILTER (WHERE status = 'clicked') as clicked
+                FROM email_sends
+            ) e, (
+                SELECT COUNT(*) as affiliates FROM affiliates WHERE status = 'active'
+            ) a
         """)
     except Exception as e:
         logger.error("Status check failed", error=str(e))
@@ -283,6 +295,7 @@ async def get_keyword_trend(keyword: str):
     if not settings.serpapi_api_key:
         raise HTTPException(status_code=503, detail="SerpApi not configured")
 
+    analyzer = None
     try:
         from services.trends_analyzer import TrendsAnalyzer
         analyzer = TrendsAnalyzer()
@@ -301,6 +314,9 @@ async def get_keyword_trend(keyword: str):
     except Exception as e:
         logger.error("Trend lookup failed", keyword=keyword, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if analyzer:
+            await analyzer.aclose()
 
 
 @app.post("/keywords/compare")
@@ -311,6 +327,7 @@ async def compare_keywords(request: Request):
     if not settings.serpapi_api_key:
         raise HTTPException(status_code=503, detail="SerpApi not configured")
 
+    analyzer = None
     try:
         data = await request.json()
         keywords = data.get("keywords", [])
@@ -328,6 +345,9 @@ async def compare_keywords(request: Request):
     except Exception as e:
         logger.error("Keyword comparison failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if analyzer:
+            await analyzer.aclose()
 
 
 @app.get("/tasks/{task_id}")
@@ -2,12 +2,20 @@
 ReelForge Marketing Engine - Celery Configuration
 """
 
+import asyncio
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from kombu import Exchange, Queue
 
 from app.config import get_settings
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows; fall back to the stdlib loop
+    uvloop = None
+
 settings = get_settings()
 
 celery_app = Celery(
@@ -30,6 +38,7 @@ celery_app.conf.update(
     enable_utc=True,
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    worker_max_tasks_per_child=settings.worker_max_tasks_per_child,
     result_expires=86400,
     task_default_queue='default',
     task_queues=(
@@ -37,46 +46,48 @@ celery_app.conf.update(
         Queue('discovery', Exchange('discovery'), routing_key='discovery'),
         Queue('outreach', Exchange('outreach'), routing_key='outreach'),
     ),
+    # Scheduled runs are fire-and-forget, so they skip the result backend write. Manual
+    # triggers from the API keep their results for /tasks/{task_id}.
     beat_schedule={
         'youtube-discovery-daily': {
             'task': 'tasks.discovery_tasks.run_youtube_discovery',
             'schedule': crontab(hour=2, minute=0),
-            'options': {'queue': 'discovery'}
+            'options': {'queue': 'discovery', 'ignore_result': True}
         },
         'email-extraction-periodic': {
             'task': 'tasks.enrichment_tasks.run_email_extraction',
             'schedule': crontab(hour='*/6', minute=0),
-            'options': {'queue': 'default'}
+            'options': {'queue': 'default', 'ignore_result': True}
         },
         'email-verification-periodic': {
             'task': 'tasks.enrichment_tasks.run_email_verification',
             'schedule': crontab(hour='*/6', minute=30),
-            'options': {'queue': 'default'}
+            'options': {'queue': 'default', 'ignore_result': True}
         },
         'sequence-processing-frequent': {
             'task': 'tasks.outreach_tasks.process_pending_sequences',
             'schedule': crontab(minute='*/15'),
-            'options': {'queue': 'outreach'}
+            'options': {'queue': 'outreach', 'ignore_result': True}
         },
         'auto-enrollment-periodic': {
             'task': 'tasks.outreach_tasks.auto_enroll_prospects',
             'schedule': crontab(hour='*/3', minute=0),
-            'options': {'queue': 'outreach'}
+            'options': {'queue': 'outreach', 'ignore_result': True}
         },
         'brevo-sync-daily': {
             'task': 'tasks.maintenance_tasks.sync_contacts_to_brevo',
             'schedule': crontab(hour=6, minute=0),  # Daily at 6 AM UTC
-            'options': {'queue': 'default'}
+            'options': {'queue': 'default', 'ignore_result': True}
         },
         'deliverability-check-daily': {
             'task': 'tasks.maintenance_tasks.check_deliverability_metrics',
             'schedule': crontab(hour=9, minute=0),  # Daily at 9 AM UTC (after morning sends)
-            'options': {'queue': 'default'}
+            'options': {'queue': 'default', 'ignore_result': True}
         },
         'keyword-trends-monthly': {
             'task': 'tasks.maintenance_tasks.analyze_keyword_trends',
             'schedule': crontab(day_of_month=1, hour=3, minute=0),  # 1st of each month at 3 AM UTC
-            'options': {'queue': 'default'}
+            'options': {'queue': 'default', 'ignore_result': True}
         },
     },
 )
@@ -88,3 +99,41 @@ class BaseTaskWithRetry(celery_app.Task):
     retry_backoff_max = 3600
     retry_jitter = True
     max_retries = 3
+
+
+# One event loop per worker process, reused by every task so loop-bound resources
+# (the shared database pool) survive between task runs
+_worker_loop: asyncio.AbstractEventLoop = None
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def run_async(coro):
+    """Run a task coroutine on the worker's persistent event loop."""
+    return _get_worker_loop().run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _init_worker_loop(**kwargs):
+    _get_worker_loop()
+
+
+@worker_process_shutdown.connect
+def _close_worker_loop(**kwargs):
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    from app.database import close_database
+    from services.http_client import close_shared_clients
+    try:
+        _worker_loop.run_until_complete(close_shared_clients())
+        _worker_loop.run_until_complete(close_database())
+    finally:
+        _worker_loop.close()
+        _worker_loop = None
@@ -0,0 +1,19 @@
+-- Migration: Covering partial index for the email verification queue
+-- verify_batch streams its queue through a cursor:
+--   SELECT mp.id, mp.email, c.status, c.is_deliverable
+--   FROM marketing_prospects mp
+--   LEFT JOIN email_verification_cache c ON c.email = lower(trim(mp.email)) AND c.verified_at > ...
+--   WHERE mp.email IS NOT NULL AND mp.email_verified = FALSE
+--   ORDER BY mp.relevance_score DESC LIMIT $1
+-- This index matches the marketing_prospects predicate and sort exactly, so the outer side
+-- of the join is an index-only scan that stops after LIMIT rows instead of a full scan + sort;
+-- each row then probes email_verification_cache by its primary key.
+
+-- CONCURRENTLY avoids blocking writes on marketing_prospects while building.
+-- Run outside a transaction block (psql autocommit, not inside BEGIN/COMMIT).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_prospects_verify_queue
+ON marketing_prospects(relevance_score DESC)
+INCLUDE (id, email)
+WHERE email IS NOT NULL AND email_verified = FALSE;
+
+ANALYZE marketing_prospects;
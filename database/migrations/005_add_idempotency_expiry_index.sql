@@ -0,0 +1,10 @@
+-- Migration: Index idempotency_keys by expiry
+-- cleanup_old_data deletes expired keys in chunks:
+--   DELETE FROM idempotency_keys WHERE key IN (
+--       SELECT key FROM idempotency_keys WHERE expires_at < NOW() LIMIT 5000)
+-- Without this index every chunk is a sequential scan of the whole table.
+
+-- CONCURRENTLY avoids blocking writes on idempotency_keys while building.
+-- Run outside a transaction block (psql autocommit, not inside BEGIN/COMMIT).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_idempotency_keys_expires_at
+ON idempotency_keys(expires_at);
@@ -0,0 +1,17 @@
+-- Migration: Persistent cache of email verification verdicts
+-- verify_batch joins the verification queue against this table and reuses any
+-- verdict younger than email_verification_cache_days instead of calling the
+-- provider again. Prospects whose address came back invalid or catch-all stay
+-- email_verified = FALSE and are picked up again on every run, so without the
+-- cache they would be re-billed each time.
+
+CREATE TABLE IF NOT EXISTS email_verification_cache (
+    email VARCHAR(255) PRIMARY KEY,
+    status VARCHAR(50) NOT NULL,
+    is_deliverable BOOLEAN NOT NULL,
+    verified_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Old verdicts are ignored by age; this index keeps any later purge cheap
+CREATE INDEX IF NOT EXISTS idx_email_verification_cache_verified_at
+ON email_verification_cache(verified_at);
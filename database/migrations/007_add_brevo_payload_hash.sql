@@ -0,0 +1,7 @@
+-- Migration: Fingerprint of the last contact payload synced to Brevo
+-- sync_contacts_to_brevo hashes each contact's import payload (SHA-256 over
+-- sorted-key JSON). When it matches this column and the last sync is inside the
+-- 7-day refresh window, the prospect is re-stamped instead of re-sent.
+
+ALTER TABLE marketing_prospects
+ADD COLUMN IF NOT EXISTS brevo_payload_hash CHAR(64);
@@ -0,0 +1,26 @@
+-- Migration: Partial indexes for the Brevo sync candidate query
+-- sync_contacts_to_brevo reads two branches, each ordered by relevance_score DESC:
+--   never synced:   ... AND brevo_synced_at IS NULL
+--   already synced: ... AND brevo_synced_at IS NOT NULL
+--                       AND (updated_at > brevo_synced_at OR brevo_synced_at < NOW() - INTERVAL '7 days')
+-- on top of: email_verified = TRUE AND email IS NOT NULL AND status NOT IN ('bounced', 'unsubscribed').
+-- With one index per branch the LIMIT is met by walking the index, not sorting the table.
+-- (NOW() cannot appear in an index predicate, so the staleness test is checked per row
+-- from the INCLUDEd columns.)
+
+-- CONCURRENTLY avoids blocking writes on marketing_prospects while building.
+-- Run outside a transaction block (psql autocommit, not inside BEGIN/COMMIT).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_prospects_brevo_unsynced
+ON marketing_prospects(relevance_score DESC)
+WHERE email_verified = TRUE AND email IS NOT NULL
+  AND status NOT IN ('bounced', 'unsubscribed')
+  AND brevo_synced_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_prospects_brevo_synced
+ON marketing_prospects(relevance_score DESC)
+INCLUDE (brevo_synced_at, updated_at)
+WHERE email_verified = TRUE AND email IS NOT NULL
+  AND status NOT IN ('bounced', 'unsubscribed')
+  AND brevo_synced_at IS NOT NULL;
+
+ANALYZE marketing_prospects;
@@ -0,0 +1,9 @@
+-- Migration: Compute the Brevo payload fingerprint in SQL
+-- sync_contacts_to_brevo now compares brevo_payload_hash with
+--   md5(concat_ws('|', email, full_name, ..., status, relevance_score))
+-- inside the candidate query, so rows whose only change is an unrelated column are
+-- never fetched. md5 hex digests are 32 characters; the previous SHA-256 values
+-- cannot match the new expression and are cleared.
+
+ALTER TABLE marketing_prospects
+ALTER COLUMN brevo_payload_hash TYPE VARCHAR(32) USING NULL;
@@ -0,0 +1,10 @@
+-- Migration: Index email_sends by send time
+-- check_deliverability_metrics aggregates the last day of sends:
+--   SELECT COUNT(*) ... FROM email_sends WHERE sent_at >= NOW() - INTERVAL '24 hours'
+-- The predicate is already a plain range on the column; without this index it is still
+-- a sequential scan of every send ever recorded.
+
+-- CONCURRENTLY avoids blocking writes on email_sends while building.
+-- Run outside a transaction block (psql autocommit, not inside BEGIN/COMMIT).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sends_sent_at
+ON email_sends(sent_at);
@@ -57,7 +57,8 @@ CREATE TABLE IF NOT EXISTS marketing_prospects (
     verified_at TIMESTAMP,
     verification_status VARCHAR(50),
     nlp_relevance_score FLOAT,
-    brevo_synced_at TIMESTAMP
+    brevo_synced_at TIMESTAMP,
+    brevo_payload_hash VARCHAR(32)
 );
 
 -- Competitor Keywords
@@ -157,6 +158,14 @@ CREATE TABLE IF NOT EXISTS idempotency_keys (
     expires_at TIMESTAMP
 );
 
+-- Email Verification Cache (verdicts keyed by lowercased address)
+CREATE TABLE IF NOT EXISTS email_verification_cache (
+    email VARCHAR(255) PRIMARY KEY,
+    status VARCHAR(50) NOT NULL,
+    is_deliverable BOOLEAN NOT NULL,
+    verified_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_prospects_email ON marketing_prospects(email);
 CREATE INDEX IF NOT EXISTS idx_prospects_status ON marketing_prospects(status);
@@ -164,7 +173,9 @@ CREATE INDEX IF NOT EXISTS idx_prospects_youtube ON marketing_prospects(youtube_
 CREATE INDEX IF NOT EXISTS idx_sequences_status ON outreach_sequences(status);
 CREATE INDEX IF NOT EXISTS idx_sequences_next_send ON outreach_sequences(next_send_at);
 CREATE INDEX IF NOT EXISTS idx_sends_message_id ON email_sends(brevo_message_id);
+CREATE INDEX IF NOT EXISTS idx_sends_sent_at ON email_sends(sent_at);
 CREATE INDEX IF NOT EXISTS idx_keywords_platform ON competitor_keywords(platform, is_active);
+CREATE INDEX IF NOT EXISTS idx_email_verification_cache_verified_at ON email_verification_cache(verified_at);
 
 -- Unique constraint to prevent duplicate emails for the same sequence step
 CREATE UNIQUE INDEX IF NOT EXISTS idx_sends_sequence_step_unique ON email_sends(sequence_id, step_number);
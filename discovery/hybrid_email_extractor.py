@@ -14,14 +14,22 @@ from app.database import get_database_async
 
 logger = structlog.get_logger()
 
+# Cheap prefilter: an "@" in any form (literal or HTML entity) must appear before parsing is worthwhile
+AT_SIGN_HINT = re.compile(r'@|&#0*64;|&#x0*40;|&commat;', re.IGNORECASE)
+
+EXCLUDED_EMAIL_FRAGMENTS = ('example.com', 'email.com', 'domain.com', 'sentry.io', 'google.com', 'youtube.com')
+NOREPLY_PREFIXES = ('noreply', 'no-reply')
+
 
 class HybridEmailExtractor:
     EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
     
-    def __init__(self):
+    def __init__(self, db_pool=None):
         self.settings = get_settings()
+        # Caller-owned pool to reuse; without one, extract_for_prospects opens and closes its own
+        self.db_pool = db_pool
     
-    async def extract_for_prospects(self, limit: int = 30, only_missing: bool = True) -> dict:
+    async def extract_for_prospects(self, limit: int = 30, only_missing: bool = True, prospect_ids: Optional[list] = None) -> dict:
         db = None
 
         results = {
@@ -32,8 +40,9 @@ class HybridEmailExtractor:
             "failed": 0
         }
 
+        owns_pool = self.db_pool is None
         try:
-            db = await get_database_async()
+            db = self.db_pool or await get_database_async()
 
             query = """
                 SELECT id, youtube_channel_id, youtube_handle, website_url, bio_link_url
@@ -48,7 +57,15 @@ class HybridEmailExtractor:
                 LIMIT $1
             """
 
-            prospects = await db.fetch(query, limit)
+            if prospect_ids is not None:
+                # A chunk dispatched by run_email_extraction; skip rows enriched since it was queued
+                prospects = await db.fetch("""
+                    SELECT id, youtube_channel_id, youtube_handle, website_url, bio_link_url
+                    FROM marketing_prospects
+                    WHERE id = ANY($1::uuid[]) AND email IS NULL
+                """, prospect_ids)
+            else:
+                prospects = await db.fetch(query, limit)
 
             for prospect in prospects:
                 results["processed"] += 1
@@ -86,7 +103,7 @@ class HybridEmailExtractor:
             logger.error("Email extraction failed", error=str(e))
             results["error"] = str(e)
         finally:
-            if db:
+            if db and owns_pool:
                 await db.close()
 
         return results
@@ -104,7 +121,8 @@ class HybridEmailExtractor:
                 })
                 
                 if response.status_code == 200:
-                    email = self._extract_email_from_html(response.text)
+                    # lxml parsing is CPU-bound; keep it off the event loop
+                    email = await asyncio.to_thread(self._extract_email_from_html, response.text)
                     if email:
                         return email, "http"
         except Exception as e:
@@ -133,7 +151,7 @@ class HybridEmailExtractor:
                     await asyncio.sleep(2)
                     
                     content = await page.content()
-                    return self._extract_email_from_html(content)
+                    return await asyncio.to_thread(self._extract_email_from_html, content)
                 finally:
                     await browser.close()
                     
@@ -142,15 +160,16 @@ class HybridEmailExtractor:
             return None
     
     def _extract_email_from_html(self, html: str) -> Optional[str]:
+        # Most pages without a contact address never contain an "@"; skip the full DOM parse for them
+        if not AT_SIGN_HINT.search(html):
+            return None
+        
         soup = BeautifulSoup(html, 'lxml')
         text = soup.get_text(separator=' ')
         
-        excluded = ['example.com', 'email.com', 'domain.com', 'sentry.io', 'google.com', 'youtube.com']
-        
         for match in self.EMAIL_PATTERN.findall(text):
             email = match.lower()
-            if not any(ex in email for ex in excluded):
-                if not email.startswith('noreply') and not email.startswith('no-reply'):
-                    return email
+            if not any(ex in email for ex in EXCLUDED_EMAIL_FRAGMENTS) and not email.startswith(NOREPLY_PREFIXES):
+                return email
         
         return None
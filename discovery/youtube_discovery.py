@@ -4,14 +4,52 @@ YouTube Discovery Engine
 
 import asyncio
 import re
+import threading
+from functools import lru_cache
 from typing import Optional
+import httplib2
 from googleapiclient.discovery import build
 import structlog
+from aiolimiter import AsyncLimiter
 
 from app.config import get_settings
 
 logger = structlog.get_logger()
 
+# channels.list accepts at most 50 ids per call
+CHANNELS_PER_REQUEST = 50
+
+# Partial-response masks: only the fields discovery actually reads come back over the wire
+SEARCH_FIELDS = 'items(snippet/channelId)'
+CHANNEL_FIELDS = 'items(id,snippet(title,description,customUrl),statistics/subscriberCount)'
+
+EXCLUDED_EMAIL_FRAGMENTS = ('example.com', 'email.com', 'domain.com')
+
+# Query text is built once; asyncpg keys its per-connection statement cache on it
+EXISTING_CHANNELS_SQL = "SELECT youtube_channel_id FROM marketing_prospects WHERE youtube_channel_id = ANY($1::text[])"
+
+# ON CONFLICT covers channels inserted by a concurrent keyword search since the existence check
+INSERT_PROSPECTS_SQL = """
+    INSERT INTO marketing_prospects (
+        youtube_channel_id, youtube_handle, full_name,
+        youtube_subscribers, email, primary_platform,
+        relevance_score, competitor_mentions, raw_data,
+        status, discovered_at
+    )
+    SELECT c.channel_id, c.handle, c.title, c.subscribers, c.email, 'youtube',
+           0.6, ARRAY[$6::text], '{}', 'discovered', NOW()
+    FROM unnest($1::text[], $2::text[], $3::text[], $4::int[], $5::text[])
+        AS c(channel_id, handle, title, subscribers, email)
+    ON CONFLICT (youtube_channel_id) DO NOTHING
+    RETURNING youtube_channel_id
+"""
+
+
+@lru_cache(maxsize=4)
+def _build_youtube(api_key: str):
+    """Build the API client once per process; build() fetches and parses the discovery document."""
+    return build('youtube', 'v3', developerKey=api_key, cache_discovery=False)
+
 
 class YouTubeDiscovery:
     EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
@@ -20,7 +58,17 @@ class YouTubeDiscovery:
         self.settings = get_settings()
         self.api_key = api_key
         self.db = db
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = _build_youtube(api_key)
+        # httplib2.Http is not thread-safe; each to_thread worker executes requests on its own
+        self._local = threading.local()
+        # Paces every API call made through this instance, so concurrent keyword searches share one budget
+        self._limiter = AsyncLimiter(1, self.settings.youtube_api_rate_limit)
+    
+    def _http(self) -> httplib2.Http:
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = httplib2.Http(timeout=30)
+        return http
     
     async def search_and_store(self, keyword: str, max_results: int = 50) -> dict:
         results = {
@@ -32,15 +80,17 @@ class YouTubeDiscovery:
         }
         
         try:
-            search_response = await asyncio.to_thread(
-                lambda: self.youtube.search().list(
-                    q=keyword,
-                    part='snippet',
-                    type='video',
-                    maxResults=min(max_results, 50),
-                    order='relevance'
-                ).execute()
-            )
+            async with self._limiter:
+                search_response = await asyncio.to_thread(
+                    lambda: self.youtube.search().list(
+                        q=keyword,
+                        part='snippet',
+                        type='video',
+                        maxResults=min(max_results, 50),
+                        order='relevance',
+                        fields=SEARCH_FIELDS
+                    ).execute(http=self._http())
+                )
             
             videos = search_response.get('items', [])
             results["videos_searched"] = len(videos)
@@ -48,18 +98,24 @@ class YouTubeDiscovery:
             channel_ids = list(set(v['snippet']['channelId'] for v in videos))
             results["channels_found"] = len(channel_ids)
             
-            for channel_id in channel_ids:
+            # One existence check for the whole page instead of one per channel
+            existing = {
+                row['youtube_channel_id'] for row in await self.db.fetch(EXISTING_CHANNELS_SQL, channel_ids)
+            }
+            results["duplicates_skipped"] = len(existing)
+            new_channel_ids = [channel_id for channel_id in channel_ids if channel_id not in existing]
+            
+            prospects = []
+            for channel in await self._fetch_channels(new_channel_ids):
                 try:
-                    status = await self._process_channel(channel_id, keyword)
-                    if status == "new":
-                        results["prospects_created"] += 1
-                    elif status == "duplicate":
-                        results["duplicates_skipped"] += 1
+                    prospect = self._build_prospect(channel)
+                    if prospect:
+                        prospects.append(prospect)
                 except Exception as e:
-                    logger.error("Channel processing failed", channel_id=channel_id, error=str(e))
+                    logger.error("Channel processing failed", channel_id=channel.get('id'), error=str(e))
                     results["errors"] += 1
-                
-                await asyncio.sleep(self.settings.email_verification_rate_limit)
+            
+            results["prospects_created"] = await self._store_prospects(prospects, keyword)
                 
         except Exception as e:
             logger.error("YouTube search failed", keyword=keyword, error=str(e))
@@ -67,33 +123,33 @@ class YouTubeDiscovery:
         
         return results
     
-    async def _process_channel(self, channel_id: str, keyword: str) -> str:
-        existing = await self.db.fetchval(
-            "SELECT id FROM marketing_prospects WHERE youtube_channel_id = $1",
-            channel_id
-        )
-        if existing:
-            return "duplicate"
-        
-        channel_response = await asyncio.to_thread(
-            lambda: self.youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            ).execute()
-        )
-        
-        channels = channel_response.get('items', [])
-        if not channels:
-            return "skipped"
-        
-        channel = channels[0]
+    async def _fetch_channels(self, channel_ids: list) -> list:
+        """Fetch channel details with one channels.list call per 50 ids."""
+        channels = []
+        for start in range(0, len(channel_ids), CHANNELS_PER_REQUEST):
+            batch = channel_ids[start:start + CHANNELS_PER_REQUEST]
+            async with self._limiter:
+                channel_response = await asyncio.to_thread(
+                    lambda: self.youtube.channels().list(
+                        part='snippet,statistics',
+                        id=','.join(batch),
+                        maxResults=CHANNELS_PER_REQUEST,
+                        fields=CHANNEL_FIELDS
+                    ).execute(http=self._http())
+                )
+            channels.extend(channel_response.get('items', []))
+        return channels
+    
+    def _build_prospect(self, channel: dict) -> Optional[tuple]:
+        """(channel_id, handle, title, subscribers, email) for channels inside the subscriber range."""
+        channel_id = channel['id']
         snippet = channel.get('snippet', {})
         statistics = channel.get('statistics', {})
         
         subscriber_count = int(statistics.get('subscriberCount', 0))
         
         if not (self.settings.min_youtube_subscribers <= subscriber_count <= self.settings.max_youtube_subscribers):
-            return "skipped"
+            return None
         
         channel_title = snippet.get('title', '')
         description = snippet.get('description', '')
@@ -101,36 +157,37 @@ class YouTubeDiscovery:
         
         email = self._extract_email(description)
         
-        await self.db.execute("""
-            INSERT INTO marketing_prospects (
-                youtube_channel_id, youtube_handle, full_name,
-                youtube_subscribers, email, primary_platform,
-                relevance_score, competitor_mentions, raw_data,
-                status, discovered_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
-        """,
-            channel_id,
-            custom_url or channel_id,
-            channel_title,
-            subscriber_count,
-            email,
-            'youtube',
-            0.6,
-            [keyword],
-            '{}',
-            'discovered'
+        return (channel_id, custom_url or channel_id, channel_title, subscriber_count, email)
+    
+    async def _store_prospects(self, prospects: list, keyword: str) -> int:
+        """Insert all new prospects from one search in a single statement; returns rows created."""
+        if not prospects:
+            return 0
+        
+        created = await self.db.fetch(
+            INSERT_PROSPECTS_SQL,
+            [p[0] for p in prospects],
+            [p[1] for p in prospects],
+            [p[2] for p in prospects],
+            [p[3] for p in prospects],
+            [p[4] for p in prospects],
+            keyword
         )
         
-        logger.info("Prospect created", channel=channel_title, subscribers=subscriber_count, has_email=bool(email))
-        return "new"
+        created_ids = {row['youtube_channel_id'] for row in created}
+        for channel_id, _, channel_title, subscriber_count, email in prospects:
+            if channel_id in created_ids:
+                logger.info("Prospect created", channel=channel_title, subscribers=subscriber_count, has_email=bool(email))
+        
+        return len(created_ids)
     
     def _extract_email(self, text: str) -> Optional[str]:
         if not text:
             return None
         
-        excluded = ['example.com', 'email.com', 'domain.com']
         for match in self.EMAIL_PATTERN.findall(text):
-            if not any(ex in match.lower() for ex in excluded):
-                return match.lower()
+            email = match.lower()
+            if not any(ex in email for ex in EXCLUDED_EMAIL_FRAGMENTS):
+                return email
         
         return None
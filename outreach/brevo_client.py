@@ -2,21 +2,21 @@
 ReelForge Marketing Engine - Brevo Email Client
 """
 
+import orjson
 import structlog
 
 from app.config import get_settings
-from services.http_client import get_brevo_client
+from services.http_client import get_shared_brevo_client
 
 logger = structlog.get_logger()
 
 
 class BrevoClient:
-    BASE_URL = "https://api.brevo.com/v3"
-
     def __init__(self):
         self.settings = get_settings()
         self.api_key = self.settings.brevo_api_key
-        self.http_client = get_brevo_client(self.api_key)
+        # Process-wide client: connections and the send rate limit are shared, so it is never closed here
+        self.http_client = get_shared_brevo_client(self.api_key)
 
     async def send_email(
         self,
@@ -48,13 +48,10 @@ class BrevoClient:
             if tags:
                 payload["tags"] = tags
 
-            response = await self.http_client.post(
-                f"{self.BASE_URL}/smtp/email",
-                json=payload
-            )
+            response = await self.http_client.post("/smtp/email", json=payload)
 
             if response.status_code in (200, 201):
-                data = response.json()
+                data = orjson.loads(response.content)
                 return {
                     "success": True,
                     "message_id": data.get("messageId")
@@ -4,14 +4,43 @@ Uses Claude to generate personalized outreach emails based on prospect data
 """
 
 import asyncio
+import re
 import httpx
+import orjson
 import structlog
 from typing import Optional, Dict, Any
 
 from app.config import get_settings
+from services.http_client import get_shared_anthropic_client
 
 logger = structlog.get_logger()
 
+# Topic keywords reported for a video, in priority order
+TOPIC_KEYWORDS = (
+    # Core topics
+    "AI", "video editing", "content creation", "tutorial", "review",
+    "automation", "passive income", "YouTube", "TikTok", "shorts",
+    # Established competitors
+    "Pictory", "InVideo", "Synthesia", "HeyGen", "Descript", "Runway",
+    "Fliki", "Lumen5",
+    # 2025-2026 trending tools
+    "Sora", "Kling", "Pika", "Veo", "Luma", "CapCut", "OpusClip",
+    "Opus Clip", "Dream Machine", "Topaz", "ElevenLabs", "Eleven Labs",
+    # Content types
+    "faceless", "avatar", "text to video", "AI voice", "clip generator"
+)
+
+# One lookahead alternation, longest first, finds the longest keyword starting at every offset
+# in a single scan. Shorter keywords at the same offset are substrings of the match, so each
+# match expands to every keyword it contains to keep plain substring semantics.
+_TOPIC_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(kw.lower()) for kw in sorted(TOPIC_KEYWORDS, key=len, reverse=True)) + "))"
+)
+_TOPIC_CONTAINS = {
+    kw.lower(): frozenset(other.lower() for other in TOPIC_KEYWORDS if other.lower() in kw.lower())
+    for kw in TOPIC_KEYWORDS
+}
+
 
 class AIPersonalizationService:
     """Generate personalized emails using Claude API."""
@@ -47,30 +76,26 @@ class AIPersonalizationService:
         try:
             prompt = self._build_prompt(prospect, video_data, template_type)
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.ANTHROPIC_API_URL,
-                    headers={
-                        "x-api-key": self.api_key,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "max_tokens": 1024,
-                        "messages": [
-                            {"role": "user", "content": prompt}
-                        ]
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data["content"][0]["text"]
-                    return self._parse_email_response(content)
-                else:
-                    logger.error("Claude API error", status=response.status_code, body=response.text)
-                    return self._fallback_template(prospect, template_type)
+            # Shared per process: pooled connections, the Anthropic rate limit and retries on 429/5xx
+            client = get_shared_anthropic_client(self.api_key)
+            response = await client.post(
+                self.ANTHROPIC_API_URL,
+                json={
+                    "model": self.model,
+                    "max_tokens": 1024,
+                    "messages": [
+                        {"role": "user", "content": prompt}
+                    ]
+                }
+            )
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                content = data["content"][0]["text"]
+                return self._parse_email_response(content)
+            else:
+                logger.error("Claude API error", status=response.status_code, body=response.text)
+                return self._fallback_template(prospect, template_type)
                     
         except Exception as e:
             logger.error("AI personalization failed", error=str(e))
@@ -300,18 +325,8 @@ class YouTubeVideoFetcher:
     
     def _extract_topics(self, text: str) -> str:
         """Extract likely topics from video text."""
-        keywords = [
-            # Core topics
-            "AI", "video editing", "content creation", "tutorial", "review",
-            "automation", "passive income", "YouTube", "TikTok", "shorts",
-            # Established competitors
-            "Pictory", "InVideo", "Synthesia", "HeyGen", "Descript", "Runway",
-            "Fliki", "Lumen5",
-            # 2025-2026 trending tools
-            "Sora", "Kling", "Pika", "Veo", "Luma", "CapCut", "OpusClip",
-            "Opus Clip", "Dream Machine", "Topaz", "ElevenLabs", "Eleven Labs",
-            # Content types
-            "faceless", "avatar", "text to video", "AI voice", "clip generator"
-        ]
-        found = [kw for kw in keywords if kw.lower() in text.lower()]
+        present = set()
+        for match in _TOPIC_PATTERN.finditer(text.lower()):
+            present |= _TOPIC_CONTAINS[match.group(1)]
+        found = [kw for kw in TOPIC_KEYWORDS if kw.lower() in present]
         return ", ".join(found[:5]) if found else "AI video tools"
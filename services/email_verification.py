@@ -3,17 +3,27 @@ ReelForge Marketing Engine - Email Verification Service
 """
 
 import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from enum import Enum
 from typing import Optional
 from dataclasses import dataclass
 import httpx
+import orjson
 import structlog
+from aiolimiter import AsyncLimiter
 
 from app.config import get_settings
 from app.database import get_database_async
 
 logger = structlog.get_logger()
 
+# Max rows per bulk verification UPDATE statement
+VERIFICATION_UPDATE_CHUNK = 500
+# Rows buffered between the DB cursor and the verification workers
+VERIFICATION_QUEUE_SIZE = 64
+
 
 class VerificationStatus(Enum):
     VALID = "valid"
@@ -29,214 +39,345 @@ class VerificationResult:
     is_deliverable: bool
 
 
-class BouncerClient:
-    BASE_URL = "https://api.usebouncer.com/v1.1"
-    
-    def __init__(self):
+# Provider status string -> (VerificationStatus, is_deliverable); anything unlisted is UNKNOWN
+_UNKNOWN_OUTCOME = (VerificationStatus.UNKNOWN, False)
+
+_BOUNCER_STATUS_MAP = {
+    "deliverable": (VerificationStatus.VALID, True),
+    "undeliverable": (VerificationStatus.INVALID, False),
+    "risky": (VerificationStatus.CATCH_ALL, False),
+}
+
+_CLEAROUT_STATUS_MAP = {
+    "valid": (VerificationStatus.VALID, True),
+    "invalid": (VerificationStatus.INVALID, False),
+    "catch_all": (VerificationStatus.CATCH_ALL, False),
+}
+
+_HUNTER_RESULT_MAP = {
+    "deliverable": (VerificationStatus.VALID, True),
+    "undeliverable": (VerificationStatus.INVALID, False),
+    "risky": (VerificationStatus.CATCH_ALL, False),
+}
+
+
+def _canonicalize(email: str) -> str:
+    return email.strip().lower()
+
+
+class VerificationCache:
+    """Process-wide LRU cache of verification verdicts with a TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, VerificationResult]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[VerificationResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def set(self, key: str, result: VerificationResult):
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_verification_cache: Optional[VerificationCache] = None
+
+
+def get_verification_cache() -> VerificationCache:
+    global _verification_cache
+    if _verification_cache is None:
+        settings = get_settings()
+        _verification_cache = VerificationCache(
+            settings.email_verification_cache_size,
+            settings.email_verification_cache_ttl
+        )
+    return _verification_cache
+
+
+class BaseVerificationClient(ABC):
+    """Shared request de-duplication and batch logic for verification providers."""
+
+    BASE_URL = ""
+
+    def __init__(self, db_pool=None):
         self.settings = get_settings()
-        self.api_key = self.settings.bouncer_api_key
-    
-    async def verify_email(self, email: str) -> VerificationResult:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.BASE_URL}/email/verify",
-                    params={"email": email},
-                    headers={"x-api-key": self.api_key}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    status = data.get("status", "unknown")
-                    
-                    if status == "deliverable":
-                        return VerificationResult(email, VerificationStatus.VALID, True)
-                    elif status == "undeliverable":
-                        return VerificationResult(email, VerificationStatus.INVALID, False)
-                    elif status == "risky":
-                        return VerificationResult(email, VerificationStatus.CATCH_ALL, False)
-                    
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
-                
-            except Exception as e:
-                logger.error("Bouncer verification failed", error=str(e))
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
-    
-    async def verify_batch(self, limit: int = 100, only_unverified: bool = True) -> dict:
-        db = None
-        results = {"processed": 0, "valid": 0, "invalid": 0, "catch_all": 0, "unknown": 0, "errors": 0}
+        # Caller-owned pool to reuse; without one, verify_batch opens and closes its own
+        self.db_pool = db_pool
+        # Singleflight registry: concurrent lookups of the same address share one API call
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache = get_verification_cache()
+        # Provider pacing lives with the client so every caller of verify_email is rate limited
+        self._limiter = AsyncLimiter(1, self.settings.email_verification_rate_limit)
 
-        try:
-            db = await get_database_async()
-            prospects = await db.fetch(
-                "SELECT id, email FROM marketing_prospects WHERE email IS NOT NULL AND email_verified = FALSE ORDER BY relevance_score DESC LIMIT $1",
-                limit
+    def _get_client(self) -> httpx.AsyncClient:
+        """Long-lived client so consecutive verifications reuse the pooled TLS connection."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                timeout=30.0,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
             )
+        return self._client
 
-            for prospect in prospects:
-                results["processed"] += 1
-                try:
-                    result = await self.verify_email(prospect["email"])
-                    results[result.status.value] += 1
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-                    is_verified = result.status == VerificationStatus.VALID
-                    await db.execute(
-                        "UPDATE marketing_prospects SET email_verified = $1, verification_status = $2, verified_at = NOW() WHERE id = $3",
-                        is_verified, result.status.value, prospect["id"]
-                    )
+    async def verify_email(self, email: str) -> VerificationResult:
+        key = _canonicalize(email)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
 
-                    await asyncio.sleep(self.settings.email_verification_rate_limit)
-                except Exception as e:
-                    results["errors"] += 1
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._limiter:
+                result = await self._verify_remote(email)
+        except Exception as exc:
+            # Waiters get the same error; reading it back marks it retrieved when nobody else waits
+            future.set_exception(exc)
+            future.exception()
+            raise
+        except BaseException:
+            # Only a real cancellation of the leader cancels the shared lookup
+            future.cancel()
+            raise
+        else:
+            # UNKNOWN usually means a provider/network failure, so leave it retryable
+            if result.status != VerificationStatus.UNKNOWN:
+                self._cache.set(key, result)
+            future.set_result(result)
+            return result
         finally:
-            if db:
-                await db.close()
+            self._inflight.pop(key, None)
 
-        return results
+    @abstractmethod
+    async def _verify_remote(self, email: str) -> VerificationResult:
+        """Ask the provider about one address; report failures as UNKNOWN rather than raising."""
 
+    async def _persist_results(self, db, rows: list) -> None:
+        """Write (prospect_id, VerificationResult) pairs with one UPDATE per chunk."""
+        for start in range(0, len(rows), VERIFICATION_UPDATE_CHUNK):
+            chunk = rows[start:start + VERIFICATION_UPDATE_CHUNK]
+            await db.execute("""
+                UPDATE marketing_prospects AS mp
+                SET email_verified = v.verified, verification_status = v.status, verified_at = NOW()
+                FROM unnest($1::uuid[], $2::boolean[], $3::text[]) AS v(id, verified, status)
+                WHERE mp.id = v.id
+            """,
+                [prospect_id for prospect_id, _ in chunk],
+                [result.status == VerificationStatus.VALID for _, result in chunk],
+                [result.status.value for _, result in chunk]
+            )
+
+    async def _store_verdicts(self, db, verdicts: list) -> None:
+        """Upsert fresh provider verdicts into email_verification_cache."""
+        for start in range(0, len(verdicts), VERIFICATION_UPDATE_CHUNK):
+            chunk = verdicts[start:start + VERIFICATION_UPDATE_CHUNK]
+            await db.execute("""
+                INSERT INTO email_verification_cache (email, status, is_deliverable, verified_at)
+                SELECT v.email, v.status, v.deliverable, NOW()
+                FROM unnest($1::text[], $2::text[], $3::boolean[]) AS v(email, status, deliverable)
+                ON CONFLICT (email) DO UPDATE
+                SET status = EXCLUDED.status, is_deliverable = EXCLUDED.is_deliverable, verified_at = EXCLUDED.verified_at
+            """,
+                [_canonicalize(result.email) for result in chunk],
+                [result.status.value for result in chunk],
+                [result.is_deliverable for result in chunk]
+            )
 
-class ClearoutClient:
-    BASE_URL = "https://api.clearout.io/v2"
-    
-    def __init__(self):
-        self.settings = get_settings()
-        self.api_key = self.settings.clearout_api_key
-    
-    async def verify_email(self, email: str) -> VerificationResult:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.BASE_URL}/email_verify/instant",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    json={"email": email}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json().get("data", {})
-                    status = data.get("status", "unknown")
-                    
-                    status_map = {
-                        "valid": VerificationStatus.VALID,
-                        "invalid": VerificationStatus.INVALID,
-                        "catch_all": VerificationStatus.CATCH_ALL
-                    }
-                    
-                    return VerificationResult(
-                        email,
-                        status_map.get(status, VerificationStatus.UNKNOWN),
-                        status == "valid"
-                    )
-                
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
-                
-            except Exception as e:
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
-    
     async def verify_batch(self, limit: int = 100, only_unverified: bool = True) -> dict:
         db = None
-        results = {"processed": 0, "valid": 0, "invalid": 0, "catch_all": 0, "unknown": 0, "errors": 0}
+        results = {"processed": 0, "valid": 0, "invalid": 0, "catch_all": 0, "unknown": 0, "cache_hits": 0, "errors": 0}
 
-        try:
-            db = await get_database_async()
-            prospects = await db.fetch(
-                "SELECT id, email FROM marketing_prospects WHERE email IS NOT NULL AND email_verified = FALSE ORDER BY relevance_score DESC LIMIT $1",
-                limit
-            )
+        verified_rows = []
+        # Provider verdicts from this run, written back to email_verification_cache
+        fresh_verdicts = {}
+        # Rows stream from a cursor into a bounded queue; N workers verify while the read continues.
+        # verify_email paces the provider calls themselves.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=VERIFICATION_QUEUE_SIZE)
 
-            for prospect in prospects:
+        async def _worker():
+            while True:
+                prospect = await queue.get()
+                if prospect is None:
+                    return
                 results["processed"] += 1
+                if prospect["cached_status"] is not None:
+                    outcome = VerificationResult(
+                        prospect["email"], VerificationStatus(prospect["cached_status"]), prospect["cached_deliverable"]
+                    )
+                    self._cache.set(_canonicalize(prospect["email"]), outcome)
+                    results["cache_hits"] += 1
+                    results[outcome.status.value] += 1
+                    verified_rows.append((prospect["id"], outcome))
+                    continue
                 try:
-                    result = await self.verify_email(prospect["email"])
-                    results[result.status.value] += 1
+                    outcome = await self.verify_email(prospect["email"])
+                except Exception as e:
+                    logger.error("Verification failed", prospect_id=str(prospect["id"]), error=str(e))
+                    results["errors"] += 1
+                else:
+                    results[outcome.status.value] += 1
+                    verified_rows.append((prospect["id"], outcome))
+                    if outcome.status != VerificationStatus.UNKNOWN:
+                        fresh_verdicts[_canonicalize(outcome.email)] = outcome
 
-                    is_verified = result.status == VerificationStatus.VALID
-                    await db.execute(
-                        "UPDATE marketing_prospects SET email_verified = $1, verification_status = $2, verified_at = NOW() WHERE id = $3",
-                        is_verified, result.status.value, prospect["id"]
-                    )
+        owns_pool = self.db_pool is None
+        try:
+            db = self.db_pool or await get_database_async()
+            # One checkout serves both the streaming read and the bulk write-back
+            async with db.acquire() as conn:
+                workers = [asyncio.create_task(_worker()) for _ in range(self.settings.email_verification_concurrency)]
+                try:
+                    async with conn.transaction():
+                        # Verdicts still fresh in email_verification_cache ride along and skip the provider
+                        async for prospect in conn.cursor("""
+                            SELECT mp.id, mp.email, c.status AS cached_status, c.is_deliverable AS cached_deliverable
+                            FROM marketing_prospects mp
+                            LEFT JOIN email_verification_cache c
+                              ON c.email = lower(trim(mp.email))
+                             AND c.verified_at > NOW() - make_interval(days => $2)
+                            WHERE mp.email IS NOT NULL AND mp.email_verified = FALSE
+                            ORDER BY mp.relevance_score DESC
+                            LIMIT $1
+                        """, limit, self.settings.email_verification_cache_days):
+                            await queue.put(prospect)
+                except BaseException:
+                    # The read failed: stop the workers instead of feeding sentinels to a queue they may not drain
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    raise
+
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+
+                try:
+                    await self._persist_results(conn, verified_rows)
+                except Exception as e:
+                    logger.error("Failed to persist verification results", count=len(verified_rows), error=str(e))
+                    results["errors"] += len(verified_rows)
 
-                    await asyncio.sleep(self.settings.email_verification_rate_limit)
+                try:
+                    await self._store_verdicts(conn, list(fresh_verdicts.values()))
                 except Exception as e:
-                    results["errors"] += 1
+                    logger.error("Failed to cache verification verdicts", count=len(fresh_verdicts), error=str(e))
         finally:
-            if db:
+            if db and owns_pool:
                 await db.close()
 
         return results
 
 
-class HunterClient:
-    BASE_URL = "https://api.hunter.io/v2"
-    
-    def __init__(self):
-        self.settings = get_settings()
-        self.api_key = self.settings.hunter_api_key
+class BouncerClient(BaseVerificationClient):
+    BASE_URL = "https://api.usebouncer.com/v1.1"
     
-    async def verify_email(self, email: str) -> VerificationResult:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.BASE_URL}/email-verifier",
-                    params={"email": email, "api_key": self.api_key}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json().get("data", {})
-                    result = data.get("result", "unknown")
-                    
-                    if result == "deliverable":
-                        return VerificationResult(email, VerificationStatus.VALID, True)
-                    elif result == "undeliverable":
-                        return VerificationResult(email, VerificationStatus.INVALID, False)
-                    elif result == "risky":
-                        return VerificationResult(email, VerificationStatus.CATCH_ALL, False)
-                
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
-                
-            except Exception as e:
-                return VerificationResult(email, VerificationStatus.UNKNOWN, False)
+    def __init__(self, db_pool=None):
+        super().__init__(db_pool)
+        self.api_key = self.settings.bouncer_api_key
     
-    async def verify_batch(self, limit: int = 100, only_unverified: bool = True) -> dict:
-        db = None
-        results = {"processed": 0, "valid": 0, "invalid": 0, "catch_all": 0, "unknown": 0, "errors": 0}
-
+    async def _verify_remote(self, email: str) -> VerificationResult:
+        client = self._get_client()
         try:
-            db = await get_database_async()
-            prospects = await db.fetch(
-                "SELECT id, email FROM marketing_prospects WHERE email IS NOT NULL AND email_verified = FALSE ORDER BY relevance_score DESC LIMIT $1",
-                limit
+            response = await client.get(
+                "/email/verify",
+                params={"email": email},
+                headers={"x-api-key": self.api_key}
             )
+            
+            if response.status_code == 200:
+                status, deliverable = _BOUNCER_STATUS_MAP.get(orjson.loads(response.content).get("status"), _UNKNOWN_OUTCOME)
+                return VerificationResult(email, status, deliverable)
+                
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
+            
+        except Exception as e:
+            logger.error("Bouncer verification failed", error=str(e))
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
 
-            for prospect in prospects:
-                results["processed"] += 1
-                try:
-                    result = await self.verify_email(prospect["email"])
-                    results[result.status.value] += 1
 
-                    is_verified = result.status == VerificationStatus.VALID
-                    await db.execute(
-                        "UPDATE marketing_prospects SET email_verified = $1, verification_status = $2, verified_at = NOW() WHERE id = $3",
-                        is_verified, result.status.value, prospect["id"]
-                    )
+class ClearoutClient(BaseVerificationClient):
+    BASE_URL = "https://api.clearout.io/v2"
+    
+    def __init__(self, db_pool=None):
+        super().__init__(db_pool)
+        self.api_key = self.settings.clearout_api_key
+    
+    async def _verify_remote(self, email: str) -> VerificationResult:
+        client = self._get_client()
+        try:
+            response = await client.post(
+                "/email_verify/instant",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={"email": email}
+            )
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content).get("data", {})
+                status, deliverable = _CLEAROUT_STATUS_MAP.get(data.get("status"), _UNKNOWN_OUTCOME)
+                return VerificationResult(email, status, deliverable)
+            
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
+            
+        except Exception as e:
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
 
-                    await asyncio.sleep(self.settings.email_verification_rate_limit)
-                except Exception as e:
-                    results["errors"] += 1
-        finally:
-            if db:
-                await db.close()
 
-        return results
+class HunterClient(BaseVerificationClient):
+    BASE_URL = "https://api.hunter.io/v2"
+    
+    def __init__(self, db_pool=None):
+        super().__init__(db_pool)
+        self.api_key = self.settings.hunter_api_key
+    
+    async def _verify_remote(self, email: str) -> VerificationResult:
+        client = self._get_client()
+        try:
+            response = await client.get(
+                "/email-verifier",
+                params={"email": email, "api_key": self.api_key}
+            )
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content).get("data", {})
+                status, deliverable = _HUNTER_RESULT_MAP.get(data.get("result"), _UNKNOWN_OUTCOME)
+                return VerificationResult(email, status, deliverable)
+            
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
+            
+        except Exception as e:
+            return VerificationResult(email, VerificationStatus.UNKNOWN, False)
 
 
-def get_verification_client():
+def get_verification_client(db_pool=None):
     settings = get_settings()
     
     if settings.bouncer_api_key:
-        return BouncerClient()
+        return BouncerClient(db_pool)
     if settings.clearout_api_key:
-        return ClearoutClient()
+        return ClearoutClient(db_pool)
     if settings.hunter_api_key:
-        return HunterClient()
+        return HunterClient(db_pool)
     
     raise ValueError("No email verification service configured")
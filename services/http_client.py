@@ -4,9 +4,14 @@ Provides resilient HTTP client for external API calls.
 """
 
 import asyncio
-from typing import Optional, Dict, Any
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
 import httpx
+import orjson
 import structlog
+from aiolimiter import AsyncLimiter
 
 logger = structlog.get_logger()
 
@@ -15,6 +20,50 @@ DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 1.0  # seconds
 DEFAULT_RETRY_BACKOFF = 2.0  # exponential backoff multiplier
 DEFAULT_TIMEOUT = 30.0
+MAX_RETRY_DELAY = 20.0  # upper bound on any single retry sleep, server hints included
+RATE_LIMIT_REMAINING_THRESHOLD = 1  # pre-throttle a host once its quota is down to this
+
+# Quota headers, generic first; Brevo prefixes its own with x-sib-
+RATE_LIMIT_REMAINING_HEADERS = ("x-ratelimit-remaining", "x-sib-ratelimit-remaining")
+RATE_LIMIT_RESET_HEADERS = ("x-ratelimit-reset", "x-sib-ratelimit-reset")
+
+
+def _first_header(response: httpx.Response, names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = response.headers.get(name)
+        if value:
+            return value
+    return None
+
+
+def _parse_ratelimit_reset(response: httpx.Response) -> Optional[float]:
+    """Seconds until the vendor's quota window resets, from x-ratelimit-reset."""
+    reset = _first_header(response, RATE_LIMIT_RESET_HEADERS)
+    if not reset:
+        return None
+    try:
+        value = float(reset)
+    except ValueError:
+        return None
+    # Some vendors send an epoch timestamp, others a relative number of seconds
+    if value > 1_000_000_000:
+        value -= time.time()
+    return max(0.0, value)
+
+
+def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After or x-ratelimit-reset."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    return _parse_ratelimit_reset(response)
 
 
 class RetryableHTTPClient:
@@ -23,19 +72,71 @@ class RetryableHTTPClient:
     # Status codes that should trigger a retry
     RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
 
+    # Per-host monotonic deadline before which no request should be sent, shared by all clients
+    # in the process so a quota learned by one client throttles every caller of that vendor
+    _host_blocked_until: Dict[str, float] = {}
+
     def __init__(
         self,
         max_retries: int = DEFAULT_MAX_RETRIES,
         retry_delay: float = DEFAULT_RETRY_DELAY,
         retry_backoff: float = DEFAULT_RETRY_BACKOFF,
         timeout: float = DEFAULT_TIMEOUT,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        rate_limit: Optional[Tuple[float, float]] = None,
+        base_url: str = ""
     ):
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.retry_backoff = retry_backoff
         self.timeout = timeout
         self.default_headers = headers or {}
+        # Relative request paths resolve against this; its host is parsed once, not per request
+        self.base_url = base_url
+        self._base_host = httpx.URL(base_url).host if base_url else None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Client-side token bucket: (max_rate, time_period) requests, so vendor quotas are met before a 429
+        self._limiter = AsyncLimiter(*rate_limit) if rate_limit else None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff so concurrent callers don't retry in lockstep."""
+        return random.uniform(0, min(MAX_RETRY_DELAY, self.retry_delay * (self.retry_backoff ** attempt)))
+
+    def _block_host(self, host: str, seconds: float):
+        deadline = time.monotonic() + min(MAX_RETRY_DELAY, seconds)
+        if deadline > self._host_blocked_until.get(host, 0.0):
+            self._host_blocked_until[host] = deadline
+
+    def _track_quota(self, host: str, response: httpx.Response):
+        """Pre-throttle the host when the vendor reports its quota is nearly spent."""
+        remaining = _first_header(response, RATE_LIMIT_REMAINING_HEADERS)
+        if remaining is None:
+            return
+        try:
+            if int(float(remaining)) > RATE_LIMIT_REMAINING_THRESHOLD:
+                return
+        except ValueError:
+            return
+        reset = _parse_ratelimit_reset(response)
+        if reset:
+            self._block_host(host, reset)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create one pooled client so retries and repeat calls skip the TLS handshake."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def request(
         self,
@@ -52,7 +153,7 @@ class RetryableHTTPClient:
 
         Args:
             method: HTTP method (GET, POST, etc.)
-            url: Request URL
+            url: Request URL, or a path relative to base_url
             headers: Request headers (merged with default headers)
             json: JSON body
             data: Form data
@@ -66,42 +167,66 @@ class RetryableHTTPClient:
             httpx.HTTPError: After all retries exhausted
         """
         merged_headers = {**self.default_headers, **(headers or {})}
+        if self._base_host and not url.startswith(("http://", "https://")):
+            host = self._base_host
+        else:
+            host = httpx.URL(url).host
+        # Encode JSON bodies once with orjson instead of httpx's stdlib json on every attempt
+        content = kwargs.pop("content", None)
+        if json is not None:
+            content = orjson.dumps(json)
+            if not any(name.lower() == "content-type" for name in merged_headers):
+                merged_headers["Content-Type"] = "application/json"
         last_exception = None
 
         for attempt in range(self.max_retries + 1):
+            # Honor an outstanding quota window instead of spending a request to rediscover it
+            wait = self._host_blocked_until.get(host, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.request(
-                        method=method,
-                        url=url,
-                        headers=merged_headers,
-                        json=json,
-                        data=data,
-                        params=params,
-                        **kwargs
-                    )
+                client = self._get_client()
+                if self._limiter:
+                    await self._limiter.acquire()
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    headers=merged_headers,
+                    content=content,
+                    data=data,
+                    params=params,
+                    **kwargs
+                )
 
-                    # Check if we should retry based on status code
-                    if response.status_code in self.RETRYABLE_STATUS_CODES:
-                        if attempt < self.max_retries:
-                            delay = self.retry_delay * (self.retry_backoff ** attempt)
-                            logger.warning(
-                                "Retryable status code received",
-                                status=response.status_code,
-                                url=url,
-                                attempt=attempt + 1,
-                                max_retries=self.max_retries,
-                                retry_in=delay
-                            )
+                # Check if we should retry based on status code
+                if response.status_code in self.RETRYABLE_STATUS_CODES:
+                    if attempt < self.max_retries:
+                        delay = self._backoff_delay(attempt)
+                        server_delay = _parse_retry_after(response)
+                        if server_delay is not None:
+                            delay = min(MAX_RETRY_DELAY, max(server_delay, delay))
+                        if response.status_code == 429:
+                            self._block_host(host, delay)
+                        logger.warning(
+                            "Retryable status code received",
+                            status=response.status_code,
+                            url=url,
+                            attempt=attempt + 1,
+                            max_retries=self.max_retries,
+                            retry_in=delay
+                        )
+                        if response.status_code != 429:
                             await asyncio.sleep(delay)
-                            continue
+                        continue
 
-                    return response
+                self._track_quota(host, response)
+                return response
 
             except (httpx.ConnectError, httpx.ReadTimeout, httpx.WriteTimeout) as e:
                 last_exception = e
                 if attempt < self.max_retries:
-                    delay = self.retry_delay * (self.retry_backoff ** attempt)
+                    delay = self._backoff_delay(attempt)
                     logger.warning(
                         "HTTP request failed, retrying",
                         error=str(e),
@@ -149,15 +274,57 @@ def get_brevo_client(api_key: str) -> RetryableHTTPClient:
             "Content-Type": "application/json"
         },
         max_retries=3,
-        timeout=30.0
+        timeout=30.0,
+        rate_limit=(10, 1),  # Brevo allows well above this; keeps bursts polite
+        base_url="https://api.brevo.com/v3"
     )
 
 
-def get_serpapi_client() -> RetryableHTTPClient:
-    """Create a configured HTTP client for SerpApi."""
+_shared_brevo_client: Optional[RetryableHTTPClient] = None
+_shared_anthropic_client: Optional[RetryableHTTPClient] = None
+
+
+def get_shared_brevo_client(api_key: str) -> RetryableHTTPClient:
+    """Return the process-wide Brevo client, creating it on first use.
+
+    Keep-alive connections and the rate limiter are shared by every Brevo caller in the
+    process. Callers must not close it; close_shared_clients() does that at shutdown.
+    """
+    global _shared_brevo_client
+    if _shared_brevo_client is None:
+        _shared_brevo_client = get_brevo_client(api_key)
+    return _shared_brevo_client
+
+
+def get_shared_anthropic_client(api_key: str) -> RetryableHTTPClient:
+    """Return the process-wide Anthropic client, creating it on first use.
+
+    Shares one connection pool and the 50/min limiter across every AI caller in the process.
+    Callers must not close it; close_shared_clients() does that at shutdown.
+    """
+    global _shared_anthropic_client
+    if _shared_anthropic_client is None:
+        _shared_anthropic_client = get_anthropic_client(api_key)
+    return _shared_anthropic_client
+
+
+async def close_shared_clients():
+    """Close the process-wide HTTP clients."""
+    global _shared_brevo_client, _shared_anthropic_client
+    if _shared_brevo_client is not None:
+        await _shared_brevo_client.aclose()
+        _shared_brevo_client = None
+    if _shared_anthropic_client is not None:
+        await _shared_anthropic_client.aclose()
+        _shared_anthropic_client = None
+
+
+def get_serpapi_client(min_interval: float = 1.0) -> RetryableHTTPClient:
+    """Create a configured HTTP client for SerpApi, allowing one call per min_interval seconds."""
     return RetryableHTTPClient(
         max_retries=2,
-        timeout=30.0
+        timeout=30.0,
+        rate_limit=(1, min_interval)
     )
 
 
@@ -170,5 +337,6 @@ def get_anthropic_client(api_key: str) -> RetryableHTTPClient:
             "anthropic-version": "2023-06-01"
         },
         max_retries=2,
-        timeout=60.0  # AI calls can be slow
+        timeout=60.0,  # AI calls can be slow
+        rate_limit=(50, 60)
     )
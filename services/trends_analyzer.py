@@ -4,7 +4,10 @@ Analyzes keyword trends to automatically adjust discovery priorities.
 """
 
 import asyncio
+from statistics import fmean
 import httpx
+import orjson
+import redis.asyncio as redis
 import structlog
 from typing import Optional
 
@@ -20,10 +23,40 @@ class TrendsAnalyzer:
 
     BASE_URL = "https://serpapi.com/search"
 
-    def __init__(self):
+    def __init__(self, db_pool=None):
         self.settings = get_settings()
+        # Caller-owned pool to reuse; without one, analyze_all_keywords opens and closes its own
+        self.db_pool = db_pool
         self.api_key = self.settings.serpapi_api_key
-        self.http_client = get_serpapi_client()
+        # The client's token bucket is the single SerpApi pacing budget for scoring and related queries;
+        # it sits behind the trends cache, so cache hits return without waiting
+        self.http_client = get_serpapi_client(self.settings.trends_api_rate_limit)
+        self._cache: Optional[redis.Redis] = None
+
+    async def aclose(self):
+        await self.http_client.aclose()
+        if self._cache is not None:
+            await self._cache.aclose()
+            self._cache = None
+
+    def _get_cache(self) -> redis.Redis:
+        if self._cache is None:
+            self._cache = redis.from_url(self.settings.redis_url)
+        return self._cache
+
+    async def _cache_get(self, key: str) -> Optional[dict]:
+        try:
+            cached = await self._get_cache().get(key)
+        except Exception as e:
+            logger.warning("Trends cache read failed", key=key, error=str(e))
+            return None
+        return orjson.loads(cached) if cached else None
+
+    async def _cache_set(self, key: str, value: dict):
+        try:
+            await self._get_cache().setex(key, self.settings.trends_cache_ttl, orjson.dumps(value))
+        except Exception as e:
+            logger.warning("Trends cache write failed", key=key, error=str(e))
 
     async def get_trend_score(self, keyword: str, timeframe: str = "today 3-m") -> Optional[dict]:
         """
@@ -40,6 +73,12 @@ class TrendsAnalyzer:
             logger.warning("SerpApi key not configured")
             return None
 
+        # Trends data moves on a daily cadence; reuse recent answers instead of re-querying SerpApi
+        cache_key = f"trends:{timeframe}:{keyword}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         params = {
             "engine": "google_trends",
             "q": keyword,
@@ -51,46 +90,14 @@ class TrendsAnalyzer:
         try:
             response = await self.http_client.get(self.BASE_URL, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Extract interest over time
             timeline = data.get("interest_over_time", {}).get("timeline_data", [])
 
-            if not timeline:
-                return {"keyword": keyword, "average_score": 0, "trend_direction": "no_data"}
-
-            # Calculate average score from recent data points
-            scores = []
-            for point in timeline:
-                values = point.get("values", [])
-                if values and values[0].get("extracted_value") is not None:
-                    scores.append(values[0]["extracted_value"])
-
-            if not scores:
-                return {"keyword": keyword, "average_score": 0, "trend_direction": "no_data"}
-
-            avg_score = sum(scores) / len(scores)
-
-            # Determine trend direction (compare last 30% vs first 30%)
-            split = len(scores) // 3
-            if split > 0:
-                early_avg = sum(scores[:split]) / split
-                recent_avg = sum(scores[-split:]) / split
-                if recent_avg > early_avg * 1.2:
-                    trend = "rising"
-                elif recent_avg < early_avg * 0.8:
-                    trend = "declining"
-                else:
-                    trend = "stable"
-            else:
-                trend = "stable"
-
-            return {
-                "keyword": keyword,
-                "average_score": round(avg_score, 1),
-                "trend_direction": trend,
-                "data_points": len(scores)
-            }
+            result = self._summarize_timeline(keyword, timeline, 0)
+            await self._cache_set(cache_key, result)
+            return result
 
         except httpx.HTTPStatusError as e:
             logger.error("SerpApi HTTP error", keyword=keyword, status=e.response.status_code)
@@ -99,6 +106,79 @@ class TrendsAnalyzer:
             logger.error("Trends analysis failed", keyword=keyword, error=str(e))
             return None
 
+    async def get_trend_scores_batch(self, keywords: list[str], timeframe: str = "today 3-m") -> list[Optional[dict]]:
+        """
+        Get trend scores for up to 5 keywords with a single SerpApi request.
+
+        Google Trends normalizes a comparison so the strongest term peaks at 100; scores are
+        relative to the group and are not cached alongside single-keyword scores.
+
+        Returns:
+            List aligned with keywords; None entries when the request failed
+        """
+        if not self.api_key or not keywords:
+            return [None] * len(keywords)
+
+        keywords = keywords[:5]
+        params = {
+            "engine": "google_trends",
+            "q": ",".join(keywords),
+            "data_type": "TIMESERIES",
+            "date": timeframe,
+            "api_key": self.api_key
+        }
+
+        try:
+            response = await self.http_client.get(self.BASE_URL, params=params)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+
+            timeline = data.get("interest_over_time", {}).get("timeline_data", [])
+            return [self._summarize_timeline(kw, timeline, i) for i, kw in enumerate(keywords)]
+
+        except httpx.HTTPStatusError as e:
+            logger.error("SerpApi HTTP error", keywords=keywords, status=e.response.status_code)
+            return [None] * len(keywords)
+        except Exception as e:
+            logger.error("Batch trends analysis failed", keywords=keywords, error=str(e))
+            return [None] * len(keywords)
+
+    @staticmethod
+    def _summarize_timeline(keyword: str, timeline: list, index: int) -> dict:
+        """Average score and trend direction for the keyword at position index of a timeline."""
+        # Calculate average score from recent data points
+        scores = [
+            values[index]["extracted_value"]
+            for values in (point.get("values") for point in timeline)
+            if values and len(values) > index and values[index].get("extracted_value") is not None
+        ]
+
+        if not scores:
+            return {"keyword": keyword, "average_score": 0, "trend_direction": "no_data"}
+
+        avg_score = fmean(scores)
+
+        # Determine trend direction (compare last 30% vs first 30%)
+        split = len(scores) // 3
+        if split > 0:
+            early_avg = fmean(scores[:split])
+            recent_avg = fmean(scores[-split:])
+            if recent_avg > early_avg * 1.2:
+                trend = "rising"
+            elif recent_avg < early_avg * 0.8:
+                trend = "declining"
+            else:
+                trend = "stable"
+        else:
+            trend = "stable"
+
+        return {
+            "keyword": keyword,
+            "average_score": round(avg_score, 1),
+            "trend_direction": trend,
+            "data_points": len(scores)
+        }
+
     async def get_related_queries(self, keyword: str) -> list[dict]:
         """
         Get rising related queries for keyword discovery.
@@ -118,7 +198,7 @@ class TrendsAnalyzer:
         try:
             response = await self.http_client.get(self.BASE_URL, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             rising = data.get("related_queries", {}).get("rising", [])
 
@@ -142,6 +222,7 @@ class TrendsAnalyzer:
         Returns summary of changes made.
         """
         db = None
+        discovery_task = None
         results = {
             "analyzed": 0,
             "boosted": 0,
@@ -151,119 +232,74 @@ class TrendsAnalyzer:
             "errors": 0
         }
 
+        owns_pool = self.db_pool is None
         try:
-            db = await get_database_async()
-
-            # Get all keywords (active and inactive for re-evaluation)
-            keywords = await db.fetch("""
-                SELECT id, keyword, competitor_name, priority, is_active
-                FROM competitor_keywords
-                WHERE platform = 'youtube'
-                ORDER BY priority DESC
-            """)
-
-            logger.info("Starting trends analysis", keyword_count=len(keywords))
-
-            for kw in keywords:
-                try:
-                    # Rate limit: SerpApi has limits, be conservative
-                    await asyncio.sleep(self.settings.trends_api_rate_limit)
-
-                    trend_data = await self.get_trend_score(kw["keyword"])
-                    results["analyzed"] += 1
-
-                    if not trend_data:
-                        continue
-
-                    avg_score = trend_data["average_score"]
-                    trend_dir = trend_data["trend_direction"]
-                    current_priority = kw["priority"] or 0
-
-                    # Determine new priority based on trends
-                    new_priority = current_priority
-                    new_active = kw["is_active"]
-
-                    if avg_score >= self.settings.trends_rising_threshold and trend_dir == "rising":
-                        # Hot keyword: boost priority
-                        new_priority = min(10, current_priority + 2)
-                        new_active = True
-                        if new_priority > current_priority:
-                            results["boosted"] += 1
-
-                    elif avg_score >= self.settings.trends_min_interest_score:
-                        # Decent interest: slight boost if rising
-                        if trend_dir == "rising":
-                            new_priority = min(10, current_priority + 1)
-                            if new_priority > current_priority:
-                                results["boosted"] += 1
-                        elif trend_dir == "declining":
-                            new_priority = max(0, current_priority - 1)
-                            if new_priority < current_priority:
-                                results["demoted"] += 1
-
-                    else:
-                        # Low interest: demote or deactivate
-                        if avg_score < 10:
-                            new_active = False
-                            results["deactivated"] += 1
+            db = self.db_pool or await get_database_async()
+
+            logger.info("Starting trends analysis")
+
+            # Related-query discovery doesn't depend on this run's scores; overlap the two SerpApi waves
+            discovery_task = asyncio.create_task(self._discover_related_keywords(db, results))
+
+            # A few keywords are scored at once so each SerpApi call's latency overlaps the next
+            # one's wait; the SerpApi client's limiter paces only calls that miss the trends cache.
+
+            # Optionally score several keywords per request; see get_trend_scores_batch for the caveat
+            batch_size = max(1, min(5, self.settings.trends_batch_size))
+
+            # (priority, is_active, id) rows written back in one pipelined executemany
+            priority_updates = []
+
+            # Keyword rows stream from a cursor in batches to trends_concurrency workers,
+            # so the first SerpApi calls go out before the whole table has been read
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.settings.trends_concurrency * 2)
+
+            async def _worker():
+                while True:
+                    batch = await queue.get()
+                    if batch is None:
+                        return
+                    try:
+                        if len(batch) == 1:
+                            scores = [await self.get_trend_score(batch[0]["keyword"])]
                         else:
-                            new_priority = max(0, current_priority - 2)
-                            results["demoted"] += 1
-
-                    # Update if changed
-                    if new_priority != current_priority or new_active != kw["is_active"]:
-                        await db.execute("""
-                            UPDATE competitor_keywords
-                            SET priority = $1, is_active = $2, last_searched_at = NOW()
-                            WHERE id = $3
-                        """, new_priority, new_active, kw["id"])
-
-                        logger.info("Keyword priority updated",
-                                    keyword=kw["keyword"],
-                                    old_priority=current_priority,
-                                    new_priority=new_priority,
-                                    trend_score=avg_score,
-                                    trend_direction=trend_dir,
-                                    is_active=new_active)
-
-                except Exception as e:
-                    logger.error("Keyword analysis failed", keyword=kw["keyword"], error=str(e))
-                    results["errors"] += 1
-
-            # Discover new keywords from top performers
-            top_keywords = await db.fetch("""
-                SELECT keyword FROM competitor_keywords
-                WHERE is_active = TRUE AND priority >= 7
-                LIMIT 5
-            """)
-
-            for kw in top_keywords:
-                try:
-                    await asyncio.sleep(self.settings.trends_api_rate_limit)
-                    related = await self.get_related_queries(kw["keyword"])
-
-                    for query in related[:3]:  # Top 3 related per keyword
-                        query_text = query["query"]
-
-                        # Skip if already exists
-                        exists = await db.fetchval(
-                            "SELECT id FROM competitor_keywords WHERE keyword = $1",
-                            query_text
-                        )
-                        if exists:
-                            continue
-
-                        # Add new keyword suggestion
-                        await db.execute("""
-                            INSERT INTO competitor_keywords (competitor_name, keyword, platform, priority, is_active)
-                            VALUES ('Discovered', $1, 'youtube', 5, TRUE)
-                        """, query_text)
-
-                        results["new_suggestions"] += 1
-                        logger.info("New keyword discovered", keyword=query_text, source=kw["keyword"])
-
-                except Exception as e:
-                    logger.error("Related queries analysis failed", keyword=kw["keyword"], error=str(e))
+                            scores = await self.get_trend_scores_batch([kw["keyword"] for kw in batch])
+                    except Exception as e:
+                        scores = [e] * len(batch)
+                    for kw, trend_data in zip(batch, scores):
+                        self._apply_trend(kw, trend_data, results, priority_updates)
+
+            workers = [asyncio.create_task(_worker()) for _ in range(self.settings.trends_concurrency)]
+            try:
+                async with db.acquire() as conn:
+                    async with conn.transaction():
+                        batch = []
+                        # Get all keywords (active and inactive for re-evaluation)
+                        async for kw in conn.cursor("""
+                            SELECT id, keyword, competitor_name, priority, is_active
+                            FROM competitor_keywords
+                            WHERE platform = 'youtube'
+                            ORDER BY priority DESC
+                        """):
+                            batch.append(kw)
+                            if len(batch) == batch_size:
+                                await queue.put(batch)
+                                batch = []
+                        if batch:
+                            await queue.put(batch)
+            finally:
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+
+            if priority_updates:
+                await db.executemany("""
+                    UPDATE competitor_keywords
+                    SET priority = $1, is_active = $2, last_searched_at = NOW()
+                    WHERE id = $3
+                """, priority_updates)
+
+            await discovery_task
 
             logger.info("Trends analysis complete", **results)
 
@@ -271,11 +307,119 @@ class TrendsAnalyzer:
             logger.error("Trends analysis failed", error=str(e))
             results["error"] = str(e)
         finally:
-            if db:
+            if discovery_task:
+                await asyncio.gather(discovery_task, return_exceptions=True)
+            if db and owns_pool:
                 await db.close()
 
         return results
 
+    def _apply_trend(self, kw, trend_data, results: dict, priority_updates: list):
+        """Decide a keyword's new priority from its trend data and queue the change."""
+        try:
+            if isinstance(trend_data, Exception):
+                raise trend_data
+            results["analyzed"] += 1
+
+            if not trend_data:
+                return
+
+            avg_score = trend_data["average_score"]
+            trend_dir = trend_data["trend_direction"]
+            current_priority = kw["priority"] or 0
+
+            # Determine new priority based on trends
+            new_priority = current_priority
+            new_active = kw["is_active"]
+
+            if avg_score >= self.settings.trends_rising_threshold and trend_dir == "rising":
+                # Hot keyword: boost priority
+                new_priority = min(10, current_priority + 2)
+                new_active = True
+                if new_priority > current_priority:
+                    results["boosted"] += 1
+
+            elif avg_score >= self.settings.trends_min_interest_score:
+                # Decent interest: slight boost if rising
+                if trend_dir == "rising":
+                    new_priority = min(10, current_priority + 1)
+                    if new_priority > current_priority:
+                        results["boosted"] += 1
+                elif trend_dir == "declining":
+                    new_priority = max(0, current_priority - 1)
+                    if new_priority < current_priority:
+                        results["demoted"] += 1
+
+            else:
+                # Low interest: demote or deactivate
+                if avg_score < 10:
+                    new_active = False
+                    results["deactivated"] += 1
+                else:
+                    new_priority = max(0, current_priority - 2)
+                    results["demoted"] += 1
+
+            # Update if changed
+            if new_priority != current_priority or new_active != kw["is_active"]:
+                priority_updates.append((new_priority, new_active, kw["id"]))
+
+                logger.info("Keyword priority updated",
+                            keyword=kw["keyword"],
+                            old_priority=current_priority,
+                            new_priority=new_priority,
+                            trend_score=avg_score,
+                            trend_direction=trend_dir,
+                            is_active=new_active)
+
+        except Exception as e:
+            logger.error("Keyword analysis failed", keyword=kw["keyword"], error=str(e))
+            results["errors"] += 1
+
+    async def _discover_related_keywords(self, db, results: dict):
+        """Add rising related queries of the top keywords as new keyword suggestions."""
+        top_keywords = await db.fetch("""
+            SELECT keyword FROM competitor_keywords
+            WHERE is_active = TRUE AND priority >= 7
+            LIMIT 5
+        """)
+
+        # Candidate query -> the top keyword it came from (first source wins)
+        candidates = {}
+
+        for kw in top_keywords:
+            try:
+                related = await self.get_related_queries(kw["keyword"])
+
+                for query in related[:3]:  # Top 3 related per keyword
+                    candidates.setdefault(query["query"], kw["keyword"])
+
+            except Exception as e:
+                logger.error("Related queries analysis failed", keyword=kw["keyword"], error=str(e))
+
+        if not candidates:
+            return
+
+        # Skip any that already exist, checked with one query instead of one per candidate
+        existing = {
+            row["keyword"] for row in await db.fetch(
+                "SELECT keyword FROM competitor_keywords WHERE keyword = ANY($1::text[])",
+                list(candidates)
+            )
+        }
+        new_keywords = [(query_text, source) for query_text, source in candidates.items() if query_text not in existing]
+        if not new_keywords:
+            return
+
+        # Add new keyword suggestions
+        await db.executemany("""
+            INSERT INTO competitor_keywords (competitor_name, keyword, platform, priority, is_active)
+            VALUES ('Discovered', $1, 'youtube', 5, TRUE)
+        """, [(query_text,) for query_text, _ in new_keywords])
+
+        for query_text, source in new_keywords:
+            results["new_suggestions"] += 1
+            logger.info("New keyword discovered", keyword=query_text, source=source)
+
     async def get_competitor_comparison(self, keywords: list[str]) -> dict:
         """
         Compare multiple keywords head-to-head.
@@ -303,7 +447,7 @@ class TrendsAnalyzer:
         try:
             response = await self.http_client.get(self.BASE_URL, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             timeline = data.get("interest_over_time", {}).get("timeline_data", [])
             averages = data.get("interest_over_time", {}).get("averages", [])
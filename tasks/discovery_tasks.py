@@ -5,71 +5,129 @@ import sys
 sys.path.insert(0, '/app')
 
 import asyncio
+from dataclasses import asdict, dataclass
 import structlog
+import redis.asyncio as redis
 
-from celery_config import celery_app, BaseTaskWithRetry
+from celery_config import celery_app, BaseTaskWithRetry, run_async
 from app.config import get_settings
-from app.database import get_database_async
+from app.database import get_shared_pool
 
 logger = structlog.get_logger()
 
+# Keywords finished by a task run are remembered under its id so a Celery retry resumes where it failed.
+# Outlives BaseTaskWithRetry.retry_backoff_max so the last retry still finds it.
+DISCOVERY_CHECKPOINT_TTL = 7200
+
+ACTIVE_KEYWORDS_SQL = "SELECT keyword FROM competitor_keywords WHERE platform = 'youtube' AND is_active = TRUE LIMIT $1"
+
+
+@dataclass(slots=True)
+class DiscoveryStats:
+    videos_searched: int = 0
+    channels_found: int = 0
+    prospects_created: int = 0
+    duplicates_skipped: int = 0
+    keywords_resumed: int = 0
+    errors: int = 0
+
+    def merge_from(self, kw_results: dict):
+        """Add one keyword's search_and_store counters."""
+        self.videos_searched += kw_results.get("videos_searched", 0)
+        self.channels_found += kw_results.get("channels_found", 0)
+        self.prospects_created += kw_results.get("prospects_created", 0)
+        self.duplicates_skipped += kw_results.get("duplicates_skipped", 0)
+        self.errors += kw_results.get("errors", 0)
+
+
+class DiscoveryIncomplete(Exception):
+    """Some keywords failed; raised so BaseTaskWithRetry re-runs the ones not checkpointed."""
+
+
+# Imported once when the worker loads this module; a missing dependency disables the task, not the worker
+try:
+    from discovery.youtube_discovery import YouTubeDiscovery
+    _discovery_import_error = None
+except ImportError as e:
+    YouTubeDiscovery = None
+    _discovery_import_error = str(e)
+
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='discovery')
 def run_youtube_discovery(self):
-    return asyncio.run(_youtube_discovery_async())
+    return run_async(_youtube_discovery_async(self.request.id, can_retry=self.request.retries < self.max_retries))
 
 
-async def _youtube_discovery_async() -> dict:
+async def _youtube_discovery_async(task_id: str = None, can_retry: bool = False) -> dict:
     settings = get_settings()
     db = None
 
     if not settings.youtube_api_key:
         return {"status": "error", "error": "YouTube API key not configured"}
 
-    results = {
-        "videos_searched": 0,
-        "channels_found": 0,
-        "prospects_created": 0,
-        "duplicates_skipped": 0,
-        "errors": 0
-    }
+    stats = DiscoveryStats()
 
-    try:
-        db = await get_database_async()
-        from discovery.youtube_discovery import YouTubeDiscovery
-
-        discovery = YouTubeDiscovery(api_key=settings.youtube_api_key, db=db)
+    if YouTubeDiscovery is None:
+        logger.error("Discovery module import failed", error=_discovery_import_error)
+        return {**asdict(stats), "status": "import_error", "error": _discovery_import_error}
 
-        keywords = await db.fetch(
-            "SELECT keyword FROM competitor_keywords WHERE platform = 'youtube' AND is_active = TRUE LIMIT $1",
-            settings.discovery_keywords_limit
-        )
+    try:
+        db = await get_shared_pool()
+        keywords = await db.fetch(ACTIVE_KEYWORDS_SQL, settings.discovery_keywords_limit)
 
         if not keywords:
             return {"status": "warning", "message": "No keywords configured"}
 
-        for kw in keywords:
-            try:
-                kw_results = await discovery.search_and_store(keyword=kw['keyword'], max_results=settings.discovery_videos_per_keyword)
-                results["videos_searched"] += kw_results.get("videos_searched", 0)
-                results["channels_found"] += kw_results.get("channels_found", 0)
-                results["prospects_created"] += kw_results.get("prospects_created", 0)
-                results["duplicates_skipped"] += kw_results.get("duplicates_skipped", 0)
-            except Exception as e:
-                logger.error("Keyword search failed", keyword=kw['keyword'], error=str(e))
-                results["errors"] += 1
-
-        logger.info("YouTube discovery complete", **results)
-
-    except ImportError as e:
-        logger.error("Discovery module import failed", error=str(e))
-        results["status"] = "import_error"
-        results["error"] = str(e)
+        discovery = YouTubeDiscovery(api_key=settings.youtube_api_key, db=db)
+
+        async with redis.from_url(settings.redis_url) as redis_client:
+            checkpoint_key = f"discovery_checkpoint:{task_id}"
+            done = set()
+            if task_id:
+                # The checkpoint only saves work on a retry; without Redis, search every keyword
+                try:
+                    done = {member.decode() for member in await redis_client.smembers(checkpoint_key)}
+                except Exception as e:
+                    logger.warning("Discovery checkpoint unavailable", error=str(e))
+
+            # Keywords are independent; search a few at once instead of one after another
+            semaphore = asyncio.Semaphore(settings.youtube_discovery_concurrency)
+
+            async def _search(keyword: str) -> dict:
+                async with semaphore:
+                    kw_results = await discovery.search_and_store(keyword=keyword, max_results=settings.discovery_videos_per_keyword)
+                if task_id and not kw_results.get("errors"):
+                    try:
+                        async with redis_client.pipeline(transaction=False) as pipe:
+                            pipe.sadd(checkpoint_key, keyword)
+                            pipe.expire(checkpoint_key, DISCOVERY_CHECKPOINT_TTL)
+                            await pipe.execute()
+                    except Exception as e:
+                        logger.warning("Discovery checkpoint not saved", keyword=keyword, error=str(e))
+                return kw_results
+
+            pending = [kw['keyword'] for kw in keywords if kw['keyword'] not in done]
+            stats.keywords_resumed = len(keywords) - len(pending)
+            outcomes = await asyncio.gather(*[_search(keyword) for keyword in pending], return_exceptions=True)
+
+        for keyword, kw_results in zip(pending, outcomes):
+            if isinstance(kw_results, Exception):
+                logger.error("Keyword search failed", keyword=keyword, error=str(kw_results))
+                stats.errors += 1
+                continue
+            stats.merge_from(kw_results)
+
+        logger.info("YouTube discovery complete", **asdict(stats))
+
     except Exception as e:
-        logger.error("YouTube discovery failed", error=str(e))
-        results["errors"] += 1
-    finally:
-        if db:
-            await db.close()
+        logger.error("YouTube discovery failed", error=str(e), **asdict(stats))
+        # Setup failed (pool, keyword fetch, Redis); let BaseTaskWithRetry retry from whatever is checkpointed
+        raise
+
+    # search_and_store reports API failures as counts rather than raising. While retries remain,
+    # fail the attempt so the retry searches only the keywords missing from the checkpoint.
+    if task_id and can_retry and stats.errors:
+        logger.warning("YouTube discovery incomplete, retrying", **asdict(stats))
+        raise DiscoveryIncomplete(f"{stats.errors} keyword searches failed")
 
-    return results
+    return asdict(stats)
@@ -4,22 +4,72 @@ ReelForge Marketing Engine - Enrichment Tasks
 import sys
 sys.path.insert(0, '/app')
 
-import asyncio
 import structlog
+from celery import group
 
-from celery_config import celery_app, BaseTaskWithRetry
+from celery_config import celery_app, BaseTaskWithRetry, run_async
 from app.config import get_settings
-from app.database import get_database_async
+from app.database import get_shared_pool
 
 logger = structlog.get_logger()
 
+# Imported once when the worker loads this module; a missing dependency disables the task, not the worker
+try:
+    from discovery.hybrid_email_extractor import HybridEmailExtractor
+    _extractor_import_error = None
+except ImportError as e:
+    HybridEmailExtractor = None
+    _extractor_import_error = str(e)
+
+try:
+    from services.email_verification import get_verification_client
+    _verification_import_error = None
+except ImportError as e:
+    get_verification_client = None
+    _verification_import_error = str(e)
+
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def run_email_extraction(self):
-    return asyncio.run(_email_extraction_async())
+    return run_async(_dispatch_email_extraction_async())
+
 
+@celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default', ignore_result=True)
+def extract_email_chunk(self, prospect_ids: list):
+    return run_async(_email_extraction_async(prospect_ids))
 
-async def _email_extraction_async() -> dict:
+
+async def _dispatch_email_extraction_async() -> dict:
+    """Split the extraction batch into chunks so idle workers scrape in parallel."""
+    settings = get_settings()
+
+    if HybridEmailExtractor is None:
+        logger.warning("Email extractor not available", error=_extractor_import_error)
+        return {"status": "import_error"}
+
+    db = await get_shared_pool()
+    rows = await db.fetch("""
+        SELECT id FROM marketing_prospects
+        WHERE email IS NULL AND status = 'discovered'
+        ORDER BY relevance_score DESC
+        LIMIT $1
+    """, settings.email_extraction_limit)
+
+    if not rows:
+        return {"status": "skipped", "reason": "No prospects missing an email"}
+
+    prospect_ids = [str(row['id']) for row in rows]
+    chunk_size = max(1, settings.email_extraction_chunk_size)
+    chunks = [prospect_ids[i:i + chunk_size] for i in range(0, len(prospect_ids), chunk_size)]
+
+    # Fire and forget: blocking on sub-task results inside a task can deadlock the pool
+    group(extract_email_chunk.s(chunk) for chunk in chunks).apply_async()
+
+    logger.info("Email extraction dispatched", prospects=len(prospect_ids), chunks=len(chunks))
+    return {"status": "dispatched", "prospects": len(prospect_ids), "chunks": len(chunks)}
+
+
+async def _email_extraction_async(prospect_ids: list = None) -> dict:
     settings = get_settings()
     results = {
         "processed": 0,
@@ -29,18 +79,20 @@ async def _email_extraction_async() -> dict:
         "failed": 0
     }
 
-    try:
-        from discovery.hybrid_email_extractor import HybridEmailExtractor
+    if HybridEmailExtractor is None:
+        logger.warning("Email extractor not available", error=_extractor_import_error)
+        results["status"] = "import_error"
+        return results
 
-        extractor = HybridEmailExtractor()
-        extraction_results = await extractor.extract_for_prospects(limit=settings.email_extraction_limit, only_missing=True)
+    try:
+        extractor = HybridEmailExtractor(db_pool=await get_shared_pool())
+        extraction_results = await extractor.extract_for_prospects(
+            limit=settings.email_extraction_limit, only_missing=True, prospect_ids=prospect_ids
+        )
         results.update(extraction_results)
 
         logger.info("Email extraction complete", **results)
 
-    except ImportError as e:
-        logger.warning("Email extractor not available", error=str(e))
-        results["status"] = "import_error"
     except Exception as e:
         logger.error("Email extraction failed", error=str(e))
         results["error"] = str(e)
@@ -50,12 +102,13 @@ async def _email_extraction_async() -> dict:
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def run_email_verification(self):
-    return asyncio.run(_email_verification_async())
+    return run_async(_email_verification_async())
 
 
 async def _email_verification_async() -> dict:
     settings = get_settings()
     db = None
+    client = None
 
     results = {
         "processed": 0,
@@ -68,19 +121,19 @@ async def _email_verification_async() -> dict:
     if not settings.bouncer_api_key and not settings.clearout_api_key and not settings.hunter_api_key:
         return {"status": "skipped", "reason": "No verification service configured"}
 
-    try:
-        db = await get_database_async()
-        from services.email_verification import get_verification_client
+    if get_verification_client is None:
+        logger.warning("Verification module not available", error=_verification_import_error)
+        results["status"] = "import_error"
+        return results
 
-        client = get_verification_client()
+    try:
+        db = await get_shared_pool()
+        client = get_verification_client(db_pool=db)
         verification_results = await client.verify_batch(limit=settings.email_verification_limit, only_unverified=True)
         results.update(verification_results)
 
         logger.info("Email verification complete", **results)
 
-    except ImportError as e:
-        logger.warning("Verification module not available", error=str(e))
-        results["status"] = "import_error"
     except ValueError as e:
         results["status"] = "skipped"
         results["reason"] = str(e)
@@ -88,7 +141,7 @@ async def _email_verification_async() -> dict:
         logger.error("Email verification failed", error=str(e))
         results["error"] = str(e)
     finally:
-        if db:
-            await db.close()
+        if client:
+            await client.aclose()
 
     return results
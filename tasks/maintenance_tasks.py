@@ -6,19 +6,174 @@ sys.path.insert(0, '/app')
 
 import asyncio
 from datetime import datetime, timedelta
-import httpx
+from string import Template
+import orjson
 import structlog
 
-from celery_config import celery_app, BaseTaskWithRetry
+from celery_config import celery_app, BaseTaskWithRetry, run_async
 from app.config import get_settings
-from app.database import get_database_async, DatabaseTransaction
+from app.database import get_shared_pool
+from services.http_client import get_shared_brevo_client
 
 logger = structlog.get_logger()
 
+# Rows removed per DELETE statement when purging expired idempotency keys
+CLEANUP_BATCH_SIZE = 5000
+# Expired prospects removed per purge statement
+PURGE_BATCH_SIZE = 1000
+# Contacts per Brevo /contacts/import request
+BREVO_IMPORT_BATCH_SIZE = 500
+# An accepted import only means Brevo queued it; poll /processes/{id} this often, this many times
+BREVO_IMPORT_POLL_INTERVAL = 2
+BREVO_IMPORT_POLL_ATTEMPTS = 30
+
+# Fingerprint of every column that feeds the Brevo contact payload. Comparing it with
+# brevo_payload_hash in SQL keeps rows whose only change is an unrelated column from
+# being fetched at all.
+BREVO_PAYLOAD_HASH_SQL = """md5(concat_ws('|',
+    coalesce(email, ''), coalesce(full_name, ''), coalesce(primary_platform, ''),
+    coalesce(youtube_handle, ''), coalesce(instagram_handle, ''), coalesce(tiktok_handle, ''),
+    coalesce(youtube_subscribers, 0), coalesce(instagram_followers, 0), coalesce(tiktok_followers, 0),
+    coalesce(status, ''), coalesce(relevance_score, 0)
+))"""
+
+
+# Brevo sync candidates. Never-synced rows come first, then already-synced ones, each branch in
+# relevance order. Each branch is its own index range (migration 008), so the outer LIMIT stops
+# after reading only the rows it returns, with no sort over the whole table.
+BREVO_SYNC_SELECT = f"""
+    SELECT id, email, full_name, primary_platform,
+           youtube_handle, youtube_subscribers,
+           instagram_handle, instagram_followers,
+           tiktok_handle, tiktok_followers,
+           status, relevance_score, brevo_synced_at, updated_at,
+           {BREVO_PAYLOAD_HASH_SQL} AS payload_hash
+    FROM marketing_prospects
+    WHERE email_verified = TRUE
+      AND email IS NOT NULL
+      AND status NOT IN ('bounced', 'unsubscribed')
+"""
+
+BREVO_FULL_SYNC_SQL = f"""
+    SELECT * FROM (
+        (SELECT 0 AS sync_rank, p.* FROM ({BREVO_SYNC_SELECT} AND brevo_synced_at IS NULL) p
+         ORDER BY relevance_score DESC LIMIT $1)
+        UNION ALL
+        (SELECT 1 AS sync_rank, p.* FROM ({BREVO_SYNC_SELECT} AND brevo_synced_at IS NOT NULL) p
+         ORDER BY relevance_score DESC LIMIT $1)
+    ) candidates
+    ORDER BY sync_rank, relevance_score DESC
+    LIMIT $1
+"""
+
+BREVO_DUE_SYNC_SQL = f"""
+    SELECT * FROM (
+        (SELECT 0 AS sync_rank, p.* FROM ({BREVO_SYNC_SELECT} AND brevo_synced_at IS NULL) p
+         ORDER BY relevance_score DESC LIMIT $1)
+        UNION ALL
+        (SELECT 1 AS sync_rank, p.* FROM ({BREVO_SYNC_SELECT}
+              AND brevo_synced_at IS NOT NULL
+              AND (
+                  brevo_synced_at < NOW() - INTERVAL '7 days'
+                  OR (updated_at > brevo_synced_at AND brevo_payload_hash IS DISTINCT FROM {BREVO_PAYLOAD_HASH_SQL})
+              )) p
+         ORDER BY relevance_score DESC LIMIT $1)
+    ) candidates
+    ORDER BY sync_rank, relevance_score DESC
+    LIMIT $1
+"""
+
+
+# Report emails are static markup with a few values swapped in; parsed once at import
+ALERT_EMAIL_TEMPLATE = Template("""
+    <h2>ReelForge Marketing - Deliverability Alert</h2>
+    <p>The following issues were detected in your email campaign:</p>
+    <div style="background: #fff3cd; padding: 15px; border-radius: 5px; margin: 15px 0;">
+        <pre style="white-space: pre-wrap;">$alert_body</pre>
+    </div>
+    <h3>24-Hour Metrics Summary</h3>
+    <ul>
+        <li><strong>Emails Sent:</strong> $total_sent</li>
+        <li><strong>Bounced:</strong> $bounced ($bounce_rate)</li>
+        <li><strong>Open Rate:</strong> $open_rate</li>
+        <li><strong>Unsubscribes:</strong> $unsubscribes</li>
+    </ul>
+    <h3>Recommended Actions</h3>
+    <ul>
+        <li>Review recent email content for spam triggers</li>
+        <li>Check email verification is working properly</li>
+        <li>Consider reducing send volume temporarily</li>
+        <li>Review Brevo dashboard for detailed analytics</li>
+    </ul>
+    <p style="color: #666; font-size: 12px;">
+        This alert was generated automatically by ReelForge Marketing Engine.
+    </p>
+    """)
+
+TRENDS_SUMMARY_TEMPLATE = Template("""
+    <h2>ReelForge Marketing - Keyword Trends Update</h2>
+    <p>Monthly keyword trends analysis has been completed.</p>
+
+    <h3>Summary</h3>
+    <ul>
+        <li><strong>Keywords Analyzed:</strong> $analyzed</li>
+        <li><strong>Boosted (trending up):</strong> $boosted</li>
+        <li><strong>Demoted (declining):</strong> $demoted</li>
+        <li><strong>Deactivated (low interest):</strong> $deactivated</li>
+        <li><strong>New Keywords Discovered:</strong> $new_suggestions</li>
+        <li><strong>Errors:</strong> $errors</li>
+    </ul>
+
+    <p>Review keywords at: <a href="https://reelforgeai-marketing.onrender.com/keywords">/keywords</a></p>
+
+    <p style="color: #666; font-size: 12px;">
+        This report was generated automatically by ReelForge Marketing Engine using Google Trends data.
+    </p>
+    """)
+
+
+def _brevo_contact(p) -> dict:
+    """Brevo import row (email + attributes) for a prospect record."""
+    # Split off the first word only; the rest of the name is kept as-is
+    name_parts = (p["full_name"] or "").strip().split(None, 1)
+    first_name = name_parts[0] if name_parts else ""
+    last_name = name_parts[1] if len(name_parts) > 1 else ""
+
+    return {
+        "email": p["email"],
+        "attributes": {
+            "FIRSTNAME": first_name,
+            "LASTNAME": last_name,
+            "PLATFORM": p["primary_platform"] or "unknown",
+            "HANDLE": p["youtube_handle"] or p["instagram_handle"] or p["tiktok_handle"] or "",
+            "FOLLOWERS": p["youtube_subscribers"] or p["instagram_followers"] or p["tiktok_followers"] or 0,
+            "STATUS": p["status"] or "discovered",
+            "RELEVANCE_SCORE": float(p["relevance_score"] or 0)
+        }
+    }
+
+
+async def _wait_for_brevo_import(client, process_id) -> bool:
+    """Poll a Brevo import process; True once it has completed."""
+    for _ in range(BREVO_IMPORT_POLL_ATTEMPTS):
+        await asyncio.sleep(BREVO_IMPORT_POLL_INTERVAL)
+        resp = await client.get(f"/processes/{process_id}")
+        if resp.status_code != 200:
+            logger.warning("Brevo import status unavailable", process_id=process_id, status=resp.status_code)
+            return False
+        status = orjson.loads(resp.content).get("status")
+        if status == "completed":
+            return True
+        if status not in ("queued", "in_process"):
+            logger.warning("Brevo import did not complete", process_id=process_id, status=status)
+            return False
+    logger.warning("Brevo import still running, leaving batch for the next sync", process_id=process_id)
+    return False
+
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def sync_contacts_to_brevo(self, force_full_sync: bool = False):
-    return asyncio.run(_sync_brevo_async(force_full_sync=force_full_sync))
+    return run_async(_sync_brevo_async(force_full_sync=force_full_sync))
 
 
 async def _sync_brevo_async(force_full_sync: bool = False) -> dict:
@@ -28,9 +183,8 @@ async def _sync_brevo_async(force_full_sync: bool = False) -> dict:
         force_full_sync: If True, sync ALL verified prospects regardless of brevo_synced_at
     """
     settings = get_settings()
-    db = None
 
-    results = {"synced": 0, "updated": 0, "errors": 0, "skipped": 0, "force_sync": force_full_sync}
+    results = {"synced": 0, "errors": 0, "skipped": 0, "force_sync": force_full_sync}
 
     if not settings.brevo_api_key:
         logger.warning("Brevo API key not configured, skipping sync")
@@ -40,235 +194,182 @@ async def _sync_brevo_async(force_full_sync: bool = False) -> dict:
     BREVO_LIST_ID = settings.brevo_list_id
 
     try:
-        db = await get_database_async()
+        db = await get_shared_pool()
 
         if force_full_sync:
             # Force sync: get ALL verified prospects (no time filter)
             logger.info("Starting FORCED full sync to Brevo")
-            prospects = await db.fetch("""
-                SELECT id, email, full_name, primary_platform,
-                       youtube_handle, youtube_subscribers,
-                       instagram_handle, instagram_followers,
-                       tiktok_handle, tiktok_followers,
-                       status, relevance_score, brevo_synced_at, updated_at
-                FROM marketing_prospects
-                WHERE email_verified = TRUE
-                  AND email IS NOT NULL
-                  AND status NOT IN ('bounced', 'unsubscribed')
-                ORDER BY
-                    CASE WHEN brevo_synced_at IS NULL THEN 0 ELSE 1 END,
-                    relevance_score DESC
-                LIMIT $1
-            """, settings.brevo_max_sync_per_run)
+            prospects = await db.fetch(BREVO_FULL_SYNC_SQL, settings.brevo_max_sync_per_run)
         else:
             # Normal sync: only prospects that need syncing
             # 1. Never synced (brevo_synced_at IS NULL)
-            # 2. Status changed since last sync (updated_at > brevo_synced_at)
+            # 2. A Brevo payload column changed since last sync (updated_at > brevo_synced_at and the hash differs)
             # 3. Not synced in last 7 days (for periodic refresh)
-            prospects = await db.fetch("""
-                SELECT id, email, full_name, primary_platform,
-                       youtube_handle, youtube_subscribers,
-                       instagram_handle, instagram_followers,
-                       tiktok_handle, tiktok_followers,
-                       status, relevance_score, brevo_synced_at, updated_at
-                FROM marketing_prospects
-                WHERE email_verified = TRUE
-                  AND email IS NOT NULL
-                  AND status NOT IN ('bounced', 'unsubscribed')
-                  AND (
-                      brevo_synced_at IS NULL
-                      OR updated_at > brevo_synced_at
-                      OR brevo_synced_at < NOW() - INTERVAL '7 days'
-                  )
-                ORDER BY
-                    CASE WHEN brevo_synced_at IS NULL THEN 0 ELSE 1 END,
-                    relevance_score DESC
-                LIMIT $1
-            """, settings.brevo_sync_batch_limit)
+            prospects = await db.fetch(BREVO_DUE_SYNC_SQL, settings.brevo_sync_batch_limit)
         
         if not prospects:
             logger.info("No prospects to sync to Brevo")
-            return {"status": "no_prospects", "synced": 0, "updated": 0, "errors": 0}
+            return {"status": "no_prospects", "synced": 0, "errors": 0}
 
-        logger.info("Syncing prospects to Brevo", count=len(prospects))
+        due = [(p["id"], _brevo_contact(p), p["payload_hash"]) for p in prospects]
+        # Only the import rows are needed from here on; don't keep the records alive through the Brevo calls
+        del prospects
+        logger.info("Syncing prospects to Brevo", count=len(due))
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for p in prospects:
-                try:
-                    # Build contact attributes
-                    full_name = p["full_name"] or ""
-                    name_parts = full_name.split()
-                    first_name = name_parts[0] if name_parts else ""
-                    last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-                    
-                    followers = (
-                        p["youtube_subscribers"] or 
-                        p["instagram_followers"] or 
-                        p["tiktok_followers"] or 0
-                    )
-                    
-                    handle = (
-                        p["youtube_handle"] or 
-                        p["instagram_handle"] or 
-                        p["tiktok_handle"] or ""
-                    )
-                    
-                    contact = {
-                        "email": p["email"],
-                        "attributes": {
-                            "FIRSTNAME": first_name,
-                            "LASTNAME": last_name,
-                            "PLATFORM": p["primary_platform"] or "unknown",
-                            "HANDLE": handle,
-                            "FOLLOWERS": followers,
-                            "STATUS": p["status"] or "discovered",
-                            "RELEVANCE_SCORE": float(p["relevance_score"] or 0)
-                        },
+        # Paced by the client's token bucket and Brevo's quota headers, retried on 429/5xx
+        client = get_shared_brevo_client(settings.brevo_api_key)
+        for start in range(0, len(due), BREVO_IMPORT_BATCH_SIZE):
+            batch = due[start:start + BREVO_IMPORT_BATCH_SIZE]
+            try:
+                # One import job per batch; Brevo creates new contacts and updates existing ones
+                resp = await client.post(
+                    "/contacts/import",
+                    json={
+                        "jsonBody": [contact for _, contact, _ in batch],
                         "listIds": [BREVO_LIST_ID],
-                        "updateEnabled": True
+                        "updateExistingContacts": True,
+                        "emptyContactsAttributes": False
                     }
-                    
-                    resp = await client.post(
-                        "https://api.brevo.com/v3/contacts",
-                        headers={
-                            "api-key": settings.brevo_api_key,
-                            "Content-Type": "application/json"
-                        },
-                        json=contact
-                    )
-
-                    # Brevo returns:
-                    # 201 = new contact created
-                    # 204 = contact updated (when updateEnabled=True and contact exists)
-                    # 400 = bad request (invalid email format, etc.)
-                    # 401 = unauthorized (bad API key)
-                    if resp.status_code == 201:
-                        results["synced"] += 1
-                        logger.debug("Brevo contact created", email=p["email"])
-                    elif resp.status_code == 204:
-                        results["updated"] += 1
-                        logger.debug("Brevo contact updated", email=p["email"])
-                    elif resp.status_code == 400:
-                        # Check if it's a duplicate error (contact already exists without updateEnabled working)
-                        error_msg = resp.text
-                        if "duplicate" in error_msg.lower() or "already exist" in error_msg.lower():
-                            results["updated"] += 1
-                            logger.debug("Brevo contact already exists", email=p["email"])
-                        else:
-                            logger.warning("Brevo sync bad request", email=p["email"], status=resp.status_code, response=error_msg[:200])
-                            results["errors"] += 1
-                            continue
-                    elif resp.status_code == 401:
-                        logger.error("Brevo API key invalid or expired")
-                        results["errors"] += 1
-                        break  # Stop processing if auth fails
-                    else:
-                        logger.warning("Brevo sync failed", email=p["email"], status=resp.status_code, response=resp.text[:200])
-                        results["errors"] += 1
+                )
+
+                # Brevo returns:
+                # 202 = import accepted (processed asynchronously, processId in body)
+                # 400 = bad request (malformed payload)
+                # 401 = unauthorized (bad API key)
+                if resp.status_code == 202:
+                    process_id = orjson.loads(resp.content).get("processId")
+                    logger.debug("Brevo import accepted", count=len(batch), process_id=process_id)
+                    # Unconfirmed batches stay unsynced and are sent again next run
+                    if not process_id or not await _wait_for_brevo_import(client, process_id):
+                        results["skipped"] += len(batch)
                         continue
-
-                    # Mark as synced (don't update updated_at to avoid sync loop)
-                    await db.execute(
-                        "UPDATE marketing_prospects SET brevo_synced_at = NOW() WHERE id = $1",
-                        p["id"]
-                    )
-                    
-                    # Rate limit
-                    await asyncio.sleep(settings.email_verification_rate_limit)
-                    
-                except Exception as e:
-                    logger.error("Brevo contact sync error", email=p["email"], error=str(e))
-                    results["errors"] += 1
+                elif resp.status_code == 401:
+                    logger.error("Brevo API key invalid or expired")
+                    results["errors"] += len(batch)
+                    break  # Stop processing if auth fails
+                else:
+                    logger.warning("Brevo import failed", count=len(batch), status=resp.status_code, response=resp.text[:200])
+                    results["errors"] += len(batch)
+                    continue
+
+                # Import completed: mark the whole batch as synced (don't update updated_at to avoid sync loop)
+                await db.execute("""
+                    UPDATE marketing_prospects AS mp
+                    SET brevo_synced_at = NOW(), brevo_payload_hash = s.payload_hash
+                    FROM unnest($1::uuid[], $2::text[]) AS s(id, payload_hash)
+                    WHERE mp.id = s.id
+                """,
+                    [prospect_id for prospect_id, _, _ in batch],
+                    [payload_hash for _, _, payload_hash in batch]
+                )
+                results["synced"] += len(batch)
+                
+            except Exception as e:
+                logger.error("Brevo import error", count=len(batch), error=str(e))
+                results["errors"] += len(batch)
         
         logger.info("Brevo sync complete", **results)
         
     except Exception as e:
         logger.error("Brevo sync failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
 
     return results
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def purge_expired_data(self):
-    return asyncio.run(_purge_data_async())
+    return run_async(_purge_data_async())
 
 
 async def _purge_data_async() -> dict:
     settings = get_settings()
-    db = None
 
     results = {"prospects_purged": 0, "errors": 0}
 
     try:
-        db = await get_database_async()
+        db = await get_shared_pool()
         cutoff = datetime.utcnow() - timedelta(days=settings.data_retention_days)
 
-        expired = await db.fetch("""
-            SELECT id FROM marketing_prospects
-            WHERE discovered_at < $1
-              AND status NOT IN ('converted', 'active_affiliate')
-            LIMIT 100
-        """, cutoff)
-
-        for prospect in expired:
-            try:
-                async with DatabaseTransaction() as conn:
-                    await conn.execute("DELETE FROM outreach_sequences WHERE prospect_id = $1", prospect["id"])
-                    await conn.execute("DELETE FROM email_sends WHERE prospect_id = $1", prospect["id"])
-                    await conn.execute("DELETE FROM marketing_prospects WHERE id = $1", prospect["id"])
-                results["prospects_purged"] += 1
-            except Exception as e:
-                results["errors"] += 1
+        # Each statement removes a batch of prospects with their sequences and sends, in its own
+        # short transaction; repeat until the backlog is drained.
+        # SKIP LOCKED lets overlapping purge runs split the work instead of waiting on each other.
+        while True:
+            purged = await db.fetchval("""
+                WITH victims AS (
+                    SELECT id FROM marketing_prospects
+                    WHERE discovered_at < $1
+                      AND status NOT IN ('converted', 'active_affiliate')
+                      -- affiliates.prospect_id has no ON DELETE rule; one such row would fail the whole batch
+                      AND NOT EXISTS (SELECT 1 FROM affiliates a WHERE a.prospect_id = marketing_prospects.id)
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ), deleted_sequences AS (
+                    DELETE FROM outreach_sequences WHERE prospect_id IN (SELECT id FROM victims)
+                ), deleted_sends AS (
+                    DELETE FROM email_sends WHERE prospect_id IN (SELECT id FROM victims)
+                ), purged AS (
+                    DELETE FROM marketing_prospects WHERE id IN (SELECT id FROM victims)
+                    RETURNING 1
+                )
+                SELECT count(*) FROM purged
+            """, cutoff, PURGE_BATCH_SIZE)
+            results["prospects_purged"] += purged
+            if purged < PURGE_BATCH_SIZE:
+                break
 
         logger.info("Data purge complete", **results)
 
     except Exception as e:
         logger.error("Data purge failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
 
     return results
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def cleanup_old_data(self):
-    return asyncio.run(_cleanup_async())
+    return run_async(_cleanup_async())
 
 
 async def _cleanup_async() -> dict:
-    db = None
     results = {"cleaned": 0}
 
     try:
-        db = await get_database_async()
-        await db.execute("DELETE FROM idempotency_keys WHERE expires_at < NOW()")
-        results["cleaned"] = 1
-        logger.info("Cleanup complete")
+        db = await get_shared_pool()
+        # Delete in small chunks so each statement holds its locks briefly and WAL stays steady
+        while True:
+            deleted = await db.fetchval("""
+                WITH d AS (
+                    DELETE FROM idempotency_keys
+                    WHERE key IN (
+                        SELECT key FROM idempotency_keys
+                        WHERE expires_at < NOW()
+                        LIMIT $1
+                    )
+                    RETURNING 1
+                )
+                SELECT count(*) FROM d
+            """, CLEANUP_BATCH_SIZE)
+            results["cleaned"] += deleted
+            if deleted < CLEANUP_BATCH_SIZE:
+                break
+        logger.info("Cleanup complete", cleaned=results["cleaned"])
     except Exception as e:
         logger.error("Cleanup failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
 
     return results
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='default')
 def check_deliverability_metrics(self):
-    return asyncio.run(_check_deliverability_async())
+    return run_async(_check_deliverability_async())
 
 
 async def _check_deliverability_async() -> dict:
     """Check email deliverability metrics and send alerts if thresholds exceeded."""
     settings = get_settings()
-    db = None
 
     results = {
         "total_sent_24h": 0,
@@ -283,8 +384,13 @@ async def _check_deliverability_async() -> dict:
     if not settings.brevo_api_key:
         return {"status": "skipped", "reason": "No Brevo API key"}
 
+    # Alerts are the only output of this check; without a recipient there is nothing to do
+    if not settings.alert_email:
+        logger.info("No alert email configured, skipping deliverability check")
+        return {"status": "skipped", "reason": "No alert email configured"}
+
     try:
-        db = await get_database_async()
+        db = await get_shared_pool()
 
         # Get metrics from last 24 hours
         metrics = await db.fetchrow("""
@@ -297,17 +403,21 @@ async def _check_deliverability_async() -> dict:
             WHERE sent_at >= NOW() - INTERVAL '24 hours'
         """)
 
-        if metrics and metrics["total_sent"] > 0:
-            total = metrics["total_sent"]
-            results["total_sent_24h"] = total
-            results["bounced_24h"] = metrics["bounced"] or 0
-            results["bounce_rate"] = results["bounced_24h"] / total
-            results["open_rate_24h"] = (metrics["opened"] or 0) / total
+        # Nothing sent means no rates to compute and no threshold can trip
+        if not metrics or not metrics["total_sent"]:
+            logger.info("Deliverability check complete - no sends in 24h")
+            return results
+
+        total = metrics["total_sent"]
+        results["total_sent_24h"] = total
+        results["bounced_24h"] = metrics["bounced"] or 0
+        results["bounce_rate"] = results["bounced_24h"] / total
+        results["open_rate_24h"] = (metrics["opened"] or 0) / total
 
-            # Get spam complaints from Brevo (via webhook status or API)
-            # For now, use unsubscribes as a proxy indicator
-            results["spam_complaints_24h"] = metrics["unsubscribed"] or 0
-            results["spam_rate"] = results["spam_complaints_24h"] / total
+        # Get spam complaints from Brevo (via webhook status or API)
+        # For now, use unsubscribes as a proxy indicator
+        results["spam_complaints_24h"] = metrics["unsubscribed"] or 0
+        results["spam_rate"] = results["spam_complaints_24h"] / total
 
         # Check thresholds and send alerts
         alerts = []
@@ -333,7 +443,7 @@ async def _check_deliverability_async() -> dict:
                 f"Consider reviewing subject lines and sender reputation."
             )
 
-        if alerts and settings.alert_email:
+        if alerts:
             await _send_alert_email(settings, alerts, results)
             results["alerts_sent"] = len(alerts)
             logger.warning("Deliverability alerts sent", alert_count=len(alerts), to=settings.alert_email)
@@ -343,9 +453,6 @@ async def _check_deliverability_async() -> dict:
     except Exception as e:
         logger.error("Deliverability check failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
 
     return results
 
@@ -354,61 +461,40 @@ async def _send_alert_email(settings, alerts: list, metrics: dict) -> None:
     """Send deliverability alert email via Brevo."""
     alert_body = "\n\n".join(alerts)
 
-    html_content = f"""
-    <h2>ReelForge Marketing - Deliverability Alert</h2>
-    <p>The following issues were detected in your email campaign:</p>
-    <div style="background: #fff3cd; padding: 15px; border-radius: 5px; margin: 15px 0;">
-        <pre style="white-space: pre-wrap;">{alert_body}</pre>
-    </div>
-    <h3>24-Hour Metrics Summary</h3>
-    <ul>
-        <li><strong>Emails Sent:</strong> {metrics['total_sent_24h']}</li>
-        <li><strong>Bounced:</strong> {metrics['bounced_24h']} ({metrics['bounce_rate']:.1%})</li>
-        <li><strong>Open Rate:</strong> {metrics['open_rate_24h']:.1%}</li>
-        <li><strong>Unsubscribes:</strong> {metrics['spam_complaints_24h']}</li>
-    </ul>
-    <h3>Recommended Actions</h3>
-    <ul>
-        <li>Review recent email content for spam triggers</li>
-        <li>Check email verification is working properly</li>
-        <li>Consider reducing send volume temporarily</li>
-        <li>Review Brevo dashboard for detailed analytics</li>
-    </ul>
-    <p style="color: #666; font-size: 12px;">
-        This alert was generated automatically by ReelForge Marketing Engine.
-    </p>
-    """
+    html_content = ALERT_EMAIL_TEMPLATE.substitute(
+        alert_body=alert_body,
+        total_sent=metrics['total_sent_24h'],
+        bounced=metrics['bounced_24h'],
+        bounce_rate=f"{metrics['bounce_rate']:.1%}",
+        open_rate=f"{metrics['open_rate_24h']:.1%}",
+        unsubscribes=metrics['spam_complaints_24h']
+    )
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "api-key": settings.brevo_api_key,
-                    "Content-Type": "application/json"
+    try:
+        response = await get_shared_brevo_client(settings.brevo_api_key).post(
+            "/smtp/email",
+            json={
+                "sender": {
+                    "name": "ReelForge Alerts",
+                    "email": settings.brevo_sender_email
                 },
-                json={
-                    "sender": {
-                        "name": "ReelForge Alerts",
-                        "email": settings.brevo_sender_email
-                    },
-                    "to": [{"email": settings.alert_email}],
-                    "subject": "⚠️ ReelForge Deliverability Alert - Action Required",
-                    "htmlContent": html_content,
-                    "tags": ["system-alert", "deliverability"]
-                }
-            )
-
-            if response.status_code not in (200, 201):
-                logger.error("Failed to send alert email", status=response.status_code, body=response.text[:200])
-        except Exception as e:
-            logger.error("Alert email send failed", error=str(e))
+                "to": [{"email": settings.alert_email}],
+                "subject": "⚠️ ReelForge Deliverability Alert - Action Required",
+                "htmlContent": html_content,
+                "tags": ["system-alert", "deliverability"]
+            }
+        )
+
+        if response.status_code not in (200, 201):
+            logger.error("Failed to send alert email", status=response.status_code, body=response.text[:200])
+    except Exception as e:
+        logger.error("Alert email send failed", error=str(e))
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=2, queue='default')
 def analyze_keyword_trends(self):
     """Analyze Google Trends data and update keyword priorities."""
-    return asyncio.run(_analyze_trends_async())
+    return run_async(_analyze_trends_async())
 
 
 async def _analyze_trends_async() -> dict:
@@ -419,10 +505,11 @@ async def _analyze_trends_async() -> dict:
         logger.warning("SerpApi key not configured, skipping trends analysis")
         return {"status": "skipped", "reason": "No SerpApi key configured"}
 
+    analyzer = None
     try:
         from services.trends_analyzer import TrendsAnalyzer
 
-        analyzer = TrendsAnalyzer()
+        analyzer = TrendsAnalyzer(db_pool=await get_shared_pool())
         results = await analyzer.analyze_all_keywords()
 
         # Send summary email if significant changes
@@ -437,49 +524,30 @@ async def _analyze_trends_async() -> dict:
     except Exception as e:
         logger.error("Trends analysis failed", error=str(e))
         return {"status": "error", "reason": str(e)}
+    finally:
+        if analyzer:
+            await analyzer.aclose()
 
 
 async def _send_trends_summary_email(settings, results: dict) -> None:
     """Send trends analysis summary email."""
-    html_content = f"""
-    <h2>ReelForge Marketing - Keyword Trends Update</h2>
-    <p>Monthly keyword trends analysis has been completed.</p>
-
-    <h3>Summary</h3>
-    <ul>
-        <li><strong>Keywords Analyzed:</strong> {results.get('analyzed', 0)}</li>
-        <li><strong>Boosted (trending up):</strong> {results.get('boosted', 0)}</li>
-        <li><strong>Demoted (declining):</strong> {results.get('demoted', 0)}</li>
-        <li><strong>Deactivated (low interest):</strong> {results.get('deactivated', 0)}</li>
-        <li><strong>New Keywords Discovered:</strong> {results.get('new_suggestions', 0)}</li>
-        <li><strong>Errors:</strong> {results.get('errors', 0)}</li>
-    </ul>
-
-    <p>Review keywords at: <a href="https://reelforgeai-marketing.onrender.com/keywords">/keywords</a></p>
-
-    <p style="color: #666; font-size: 12px;">
-        This report was generated automatically by ReelForge Marketing Engine using Google Trends data.
-    </p>
-    """
+    html_content = TRENDS_SUMMARY_TEMPLATE.substitute(
+        {key: results.get(key, 0) for key in ("analyzed", "boosted", "demoted", "deactivated", "new_suggestions", "errors")}
+    )
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            await client.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "api-key": settings.brevo_api_key,
-                    "Content-Type": "application/json"
+    try:
+        await get_shared_brevo_client(settings.brevo_api_key).post(
+            "/smtp/email",
+            json={
+                "sender": {
+                    "name": "ReelForge Reports",
+                    "email": settings.brevo_sender_email
                 },
-                json={
-                    "sender": {
-                        "name": "ReelForge Reports",
-                        "email": settings.brevo_sender_email
-                    },
-                    "to": [{"email": settings.alert_email}],
-                    "subject": "📈 ReelForge Keyword Trends Update",
-                    "htmlContent": html_content,
-                    "tags": ["system-report", "trends"]
-                }
-            )
-        except Exception as e:
-            logger.error("Trends summary email failed", error=str(e))
+                "to": [{"email": settings.alert_email}],
+                "subject": "📈 ReelForge Keyword Trends Update",
+                "htmlContent": html_content,
+                "tags": ["system-report", "trends"]
+            }
+        )
+    except Exception as e:
+        logger.error("Trends summary email failed", error=str(e))
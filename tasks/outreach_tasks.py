@@ -4,7 +4,6 @@ ReelForge Marketing Engine - Outreach Tasks
 import sys
 sys.path.insert(0, '/app')
 
-import asyncio
 import json
 import re
 from datetime import datetime, timedelta
@@ -15,9 +14,12 @@ import redis.asyncio as redis
 # RFC 5322 compliant email regex pattern (simplified but robust)
 EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
-from celery_config import celery_app, BaseTaskWithRetry
+# How long a per-step send claim blocks duplicate sends
+SEND_CLAIM_TTL = 86400
+
+from celery_config import celery_app, BaseTaskWithRetry, run_async
 from app.config import get_settings
-from app.database import get_database_async, DatabaseTransaction
+from app.database import get_shared_pool, DatabaseTransaction
 
 logger = structlog.get_logger()
 
@@ -61,6 +63,20 @@ def safe_render_template(template_str: str, data: dict, default: str = "") -> st
         return default
 
 
+# Stateless AI helpers, built once per worker process on first use
+_ai_service = None
+_video_fetcher = None
+
+
+def _get_ai_helpers():
+    global _ai_service, _video_fetcher
+    if _ai_service is None:
+        from services.ai_personalization import AIPersonalizationService, YouTubeVideoFetcher
+        _ai_service = AIPersonalizationService()
+        _video_fetcher = YouTubeVideoFetcher()
+    return _ai_service, _video_fetcher
+
+
 async def generate_ai_email(prospect: dict, template_type: str = "initial") -> dict:
     """Generate AI-personalized email for a prospect."""
     settings = get_settings()
@@ -69,10 +85,7 @@ async def generate_ai_email(prospect: dict, template_type: str = "initial") -> d
         return None
     
     try:
-        from services.ai_personalization import AIPersonalizationService, YouTubeVideoFetcher
-        
-        ai_service = AIPersonalizationService()
-        video_fetcher = YouTubeVideoFetcher()
+        ai_service, video_fetcher = _get_ai_helpers()
         
         # Fetch latest video for context
         video_data = None
@@ -99,12 +112,11 @@ async def generate_ai_email(prospect: dict, template_type: str = "initial") -> d
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='outreach')
 def process_pending_sequences(self):
-    return asyncio.run(_process_sequences_async())
+    return run_async(_process_sequences_async())
 
 
 async def _process_sequences_async() -> dict:
     settings = get_settings()
-    db = None
     
     results = {
         "processed": 0,
@@ -118,10 +130,6 @@ async def _process_sequences_async() -> dict:
         return {"status": "error", "error": "Brevo API key not configured"}
     
     try:
-        db = await get_database_async()
-        from outreach.brevo_client import BrevoClient
-        brevo = BrevoClient()
-        
         async with redis.from_url(settings.redis_url) as redis_client:
             today = datetime.utcnow().strftime("%Y%m%d")
             daily_key = f"email_count:{today}"
@@ -135,6 +143,11 @@ async def _process_sequences_async() -> dict:
             
             remaining = settings.daily_email_limit - current_count
             
+            # Only touch the pool and the Brevo client once there is sending budget left today
+            db = await get_shared_pool()
+            from outreach.brevo_client import BrevoClient
+            brevo = BrevoClient()
+            
             # Fetch sequences that are ready to send AND don't already have an email sent for this step
             pending = await db.fetch("""
                 SELECT os.id, os.prospect_id, os.sequence_name, os.current_step,
@@ -159,9 +172,23 @@ async def _process_sequences_async() -> dict:
                 LIMIT $1
             """, remaining)
             
-            for seq in pending:
+            # Claim every fetched sequence step in one pipelined SET NX burst (race condition protection).
+            # Claims that don't end in a send are released together after the loop.
+            claim_keys = [f"send_claim:{seq['id']}:{(seq['current_step'] or 0) + 1}" for seq in pending]
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for claim_key in claim_keys:
+                    pipe.set(claim_key, "processing", nx=True, ex=SEND_CLAIM_TTL)
+                acquired = await pipe.execute()
+            held_claims = {key for key, owned in zip(claim_keys, acquired) if owned}
+            
+            for seq, claim_key in zip(pending, claim_keys):
                 results["processed"] += 1
                 
+                if claim_key not in held_claims:
+                    logger.warning("Duplicate email prevented", sequence_id=str(seq["id"]), step=(seq["current_step"] or 0) + 1)
+                    results["skipped"] += 1
+                    continue
+                
                 try:
                     # Parse steps JSON safely
                     steps = safe_json_loads(seq["steps"], [])
@@ -249,17 +276,6 @@ async def _process_sequences_async() -> dict:
                         results["skipped"] += 1
                         continue
 
-                    # Double-check for duplicates right before sending (race condition protection)
-                    existing_send = await db.fetchval("""
-                        SELECT id FROM email_sends
-                        WHERE sequence_id = $1 AND step_number = $2
-                    """, seq["id"], current_step + 1)
-
-                    if existing_send:
-                        logger.warning("Duplicate email prevented", sequence_id=str(seq["id"]), step=current_step + 1)
-                        results["skipped"] += 1
-                        continue
-
                     result = await brevo.send_email(
                         to_email=to_email,
                         to_name=seq["full_name"] or "",
@@ -269,10 +285,16 @@ async def _process_sequences_async() -> dict:
                     )
                     
                     if result.get("success"):
-                        await redis_client.incr(daily_key)
-                        await redis_client.expire(daily_key, 86400)
+                        # A sent email must stay claimed even if the bookkeeping below fails
+                        held_claims.discard(claim_key)
+                        # Count the send and mark the claim completed in one Redis round-trip
+                        async with redis_client.pipeline(transaction=False) as pipe:
+                            pipe.incr(daily_key)
+                            pipe.expire(daily_key, 86400)
+                            pipe.set(claim_key, "completed", ex=SEND_CLAIM_TTL)
+                            await pipe.execute()
                         
-                        async with DatabaseTransaction() as conn:
+                        async with DatabaseTransaction(db) as conn:
                             await conn.execute("""
                                 INSERT INTO email_sends (
                                     sequence_id, prospect_id, step_number, template_name,
@@ -318,38 +340,34 @@ async def _process_sequences_async() -> dict:
                         logger.error("Brevo send failed", error=result.get("error"), to=to_email)
                         results["errors"] += 1
                     
-                    # Rate limit between sends
-                    await asyncio.sleep(settings.youtube_api_rate_limit)
-                    
                 except Exception as e:
                     logger.error("Sequence processing error", sequence_id=str(seq["id"]), error=str(e))
                     results["errors"] += 1
+            
+            if held_claims:
+                await redis_client.delete(*held_claims)
         
         logger.info("Sequence processing complete", **results)
         
     except Exception as e:
         logger.error("Sequence processing failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
     
     return results
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='outreach')
 def auto_enroll_prospects(self):
-    return asyncio.run(_auto_enroll_async())
+    return run_async(_auto_enroll_async())
 
 
 async def _auto_enroll_async() -> dict:
     settings = get_settings()
-    db = None
     
     results = {"enrolled": 0, "skipped": 0, "errors": 0, "ai_generated": 0}
     
     try:
-        db = await get_database_async()
+        db = await get_shared_pool()
         
         prospects = await db.fetch("""
             SELECT mp.id, mp.email, mp.full_name, mp.primary_platform, 
@@ -370,21 +388,29 @@ async def _auto_enroll_async() -> dict:
             LIMIT $2
         """, settings.min_relevance_score, settings.auto_enrollment_limit)
         
+        # Template lookups repeat for every prospect on the same platform; resolve each name once per run
+        templates = {}
+        # (prospect_id, template_id, sequence_name, total_steps, next_send_at, personalization_data)
+        enrollments = []
+        
         for prospect in prospects:
             try:
                 platform = prospect["primary_platform"] or "youtube"
                 sequence_name = f"{platform}_creator"
                 
-                template = await db.fetchrow(
-                    "SELECT id, total_steps, steps FROM sequence_templates WHERE name = $1 AND is_active = TRUE",
-                    sequence_name
-                )
-                
-                # Fallback to any active template
-                if not template:
+                if sequence_name not in templates:
                     template = await db.fetchrow(
-                        "SELECT id, total_steps, steps FROM sequence_templates WHERE is_active = TRUE ORDER BY created_at DESC LIMIT 1"
+                        "SELECT id, total_steps, steps FROM sequence_templates WHERE name = $1 AND is_active = TRUE",
+                        sequence_name
                     )
+                    
+                    # Fallback to any active template
+                    if not template:
+                        template = await db.fetchrow(
+                            "SELECT id, total_steps, steps FROM sequence_templates WHERE is_active = TRUE ORDER BY created_at DESC LIMIT 1"
+                        )
+                    templates[sequence_name] = template
+                template = templates[sequence_name]
                 
                 if not template:
                     logger.warning("No sequence template found", platform=platform)
@@ -435,35 +461,42 @@ async def _auto_enroll_async() -> dict:
                     pdata["use_ai_email"] = True
                     results["ai_generated"] += 1
                 
-                await db.execute("""
-                    INSERT INTO outreach_sequences (
-                        prospect_id, sequence_template_id, sequence_name, total_steps,
-                        current_step, status, next_send_at, personalization_data, created_at
-                    ) VALUES ($1, $2, $3, $4, 0, 'pending', $5, $6, NOW())
-                """, prospect["id"], template["id"], sequence_name, template["total_steps"],
-                    first_send, json.dumps(pdata))
-                
-                # Update prospect status
-                await db.execute(
-                    "UPDATE marketing_prospects SET status = 'enrolled' WHERE id = $1",
-                    prospect["id"]
-                )
-                
-                results["enrolled"] += 1
-                logger.info("Prospect enrolled", prospect_id=str(prospect["id"]), sequence=sequence_name)
+                enrollments.append((
+                    prospect["id"], template["id"], sequence_name, template["total_steps"],
+                    first_send, json.dumps(pdata)
+                ))
                 
             except Exception as e:
                 logger.error("Enrollment failed", prospect_id=str(prospect["id"]), error=str(e))
                 results["errors"] += 1
         
+        # Write every enrollment in one transaction: pipelined sequence inserts, one status update
+        if enrollments:
+            try:
+                async with DatabaseTransaction(db) as conn:
+                    await conn.executemany("""
+                        INSERT INTO outreach_sequences (
+                            prospect_id, sequence_template_id, sequence_name, total_steps,
+                            current_step, status, next_send_at, personalization_data, created_at
+                        ) VALUES ($1, $2, $3, $4, 0, 'pending', $5, $6, NOW())
+                    """, enrollments)
+                    
+                    await conn.execute(
+                        "UPDATE marketing_prospects SET status = 'enrolled' WHERE id = ANY($1::uuid[])",
+                        [enrollment[0] for enrollment in enrollments]
+                    )
+                
+                results["enrolled"] += len(enrollments)
+                logger.info("Prospects enrolled", count=len(enrollments))
+            except Exception as e:
+                logger.error("Enrollment write failed", count=len(enrollments), error=str(e))
+                results["errors"] += len(enrollments)
+        
         logger.info("Auto-enrollment complete", **results)
         
     except Exception as e:
         logger.error("Auto-enrollment failed", error=str(e))
         results["error"] = str(e)
-    finally:
-        if db:
-            await db.close()
     
     return results
 
@@ -471,19 +504,18 @@ async def _auto_enroll_async() -> dict:
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='outreach')
 def stop_sequence_on_reply(self, prospect_id: str):
     """Stop active sequences when a prospect replies."""
-    return asyncio.run(_stop_sequence_async(prospect_id, "replied"))
+    return run_async(_stop_sequence_async(prospect_id, "replied"))
 
 
 @celery_app.task(bind=True, base=BaseTaskWithRetry, max_retries=3, queue='outreach')
 def stop_sequence_on_unsubscribe(self, prospect_id: str):
     """Stop active sequences when a prospect unsubscribes."""
-    return asyncio.run(_stop_sequence_async(prospect_id, "unsubscribed"))
+    return run_async(_stop_sequence_async(prospect_id, "unsubscribed"))
 
 
 async def _stop_sequence_async(prospect_id: str, reason: str) -> dict:
-    db = None
     try:
-        db = await get_database_async()
+        db = await get_shared_pool()
         
         result = await db.execute("""
             UPDATE outreach_sequences 
@@ -503,6 +535,3 @@ async def _stop_sequence_async(prospect_id: str, reason: str) -> dict:
     except Exception as e:
         logger.error("Failed to stop sequence", error=str(e))
         return {"success": False, "error": str(e)}
-    finally:
-        if db:
-            await db.close()